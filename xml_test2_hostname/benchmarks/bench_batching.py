@@ -0,0 +1,53 @@
+"""Per-command vs batched SCPI transmission against a simulated instrument.
+
+Run from the project root:  python -m benchmarks.bench_batching [--latency-ms 2]
+"""
+import argparse
+import time
+
+from benchmarks.sim_instrument import SimulatedInstrument
+from core.batching import send_batched, send_individually
+
+def sample_config(channels: int = 4) -> dict:
+    return {
+        "channels": [
+            {"number": n, "display": True, "label": f"CH{n}", "probe": "10",
+             "scale": "0.5", "unit": ""}
+            for n in range(1, channels + 1)
+        ],
+        "display_label": True,
+        "time_scale": "0.05",
+        "trigger": {"mode": "EDGE", "source": "CHAN1", "level": "1.2", "slope": "POS"},
+        "trigger_command": "SINGLE",
+    }
+
+def _time(fn, inst, cmds, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(inst, cmds)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main(argv=None):
+    from config.keysight_scope import build_scpi_sequence
+
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--latency-ms", type=float, default=2.0, help="round-trip latency per message")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    cmds = build_scpi_sequence(sample_config())
+    latency = args.latency_ms / 1000.0
+    single = SimulatedInstrument(latency)
+    batched = SimulatedInstrument(latency)
+    t_single = _time(send_individually, single, cmds, args.repeat)
+    t_batch = _time(send_batched, batched, cmds, args.repeat)
+
+    print(f"commands per config : {len(cmds)}")
+    print(f"per-command         : {t_single * 1000:8.2f} ms  ({single.round_trips // args.repeat} round trips)")
+    print(f"batched + *OPC?     : {t_batch * 1000:8.2f} ms  ({batched.round_trips // args.repeat} round trips)")
+    print(f"speedup             : {t_single / t_batch:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Memory and throughput of ScopeConfig records vs the old nested dicts.
+
+Run from the project root:  python -m benchmarks.bench_config_model [--configs 10000]
+
+Builds a suite of distinct configurations, keeps all of them in memory the
+way the scheduler and the diff cache do, and reports the retained size,
+parse rate, SCPI build rate (cold and memoized) and de-duplication by hash.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from config.keysight_scope import build_scpi_sequence, clear_sequence_cache
+from utils.xml_loader import iter_suite, parse_configuration
+
+MODES = ("EDGE", "GLITCH", "PULSE")
+SLOPES = ("POS", "NEG")
+SCALES = ("0.01", "0.02", "0.05", "0.1", "0.2", "0.5", "1", "2")
+
+def write_suite(path: str, count: int, channels: int = 4):
+    """Suite of `count` configurations; every 10th repeats an earlier one."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<suite>\n")
+        for i in range(count):
+            k = i - i % 10 if i % 10 == 9 else i
+            f.write(f'<configuration name="{i:05d}"><channels>')
+            for n in range(1, channels + 1):
+                f.write(f'<channel number="{n}"><display>{"ON" if (k + n) % 3 else "OFF"}</display>'
+                        f"<label>CH{n}</label><probe>10</probe>"
+                        f"<scale>{SCALES[(k + n) % len(SCALES)]}</scale></channel>")
+            f.write(f"</channels><display_label>ON</display_label><time_scale>{(k % 97 + 1) * 1e-4:g}"
+                    f"</time_scale><trigger><mode>{MODES[k % 3]}</mode><source>CHAN{k % 4 + 1}"
+                    f"</source><level>{k % 50 / 10:g}</level><slope>{SLOPES[k % 2]}</slope>"
+                    f"</trigger><trigger_command>SINGLE</trigger_command></configuration>\n")
+        f.write("</suite>\n")
+
+def legacy_parse(root) -> dict:
+    # The dict layout load_config returned before config.model
+    channels = []
+    for ch in root.find("channels").findall("channel"):
+        channels.append({
+            "number": int(ch.attrib.get("number", "1")),
+            "display": ch.findtext("display", default="OFF").strip().upper() == "ON",
+            "label": (ch.findtext("label", default="") or "").strip(),
+            "probe": (ch.findtext("probe", default="") or "").strip(),
+            "scale": (ch.findtext("scale", default="") or "").strip(),
+            "unit": (ch.findtext("unit", default="") or "").strip().upper(),
+        })
+    trig = root.find("trigger")
+    return {
+        "channels": channels,
+        "display_label": root.findtext("display_label", default="OFF").strip().upper() == "ON",
+        "time_scale": (root.findtext("time_scale", default="") or "").strip(),
+        "trigger": {
+            "mode": trig.findtext("mode", default="EDGE").strip().upper(),
+            "source": trig.findtext("source", default="CHAN1").strip().upper(),
+            "level": trig.findtext("level", default="").strip(),
+            "slope": trig.findtext("slope", default="POS").strip().upper(),
+        },
+        "trigger_command": (root.findtext("trigger_command", default="SINGLE") or "").strip().upper(),
+    }
+
+def _iter_elements(path: str):
+    for _, elem in ET.iterparse(path):
+        if elem.tag == "configuration":
+            yield elem
+
+def _retained(load) -> tuple:
+    """(result, seconds, bytes retained) for load(); timed without tracemalloc."""
+    t0 = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    configs = load()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return configs, elapsed, size
+
+def measure(count: int = 10000) -> dict:
+    with tempfile.TemporaryDirectory(prefix="xml_test2_model_") as tmp:
+        path = os.path.join(tmp, "suite.xml")
+        write_suite(path, count)
+        # Elements are parsed up front so both sides time only config building
+        elements = list(_iter_elements(path))
+        dicts, t_dicts, mem_dicts = _retained(lambda: [legacy_parse(e) for e in elements])
+        records, t_records, mem_records = _retained(
+            lambda: [parse_configuration(e) for e in elements])
+        del elements
+        t0 = time.perf_counter()
+        streamed = sum(1 for _ in iter_suite(path))
+        t_stream = time.perf_counter() - t0
+
+    clear_sequence_cache()
+    t0 = time.perf_counter()
+    for cfg in records:
+        build_scpi_sequence(cfg)
+    t_build_cold = time.perf_counter() - t0
+    # Replays hit the memo for the last SEQUENCE_CACHE_SIZE configs
+    tail = records[-1000:]
+    t0 = time.perf_counter()
+    for cfg in tail:
+        build_scpi_sequence(cfg)
+    t_build_warm = (time.perf_counter() - t0) / len(tail) * len(records)
+    clear_sequence_cache()
+    t0 = time.perf_counter()
+    for cfg in dicts:
+        build_scpi_sequence(cfg)
+    t_build_dicts = time.perf_counter() - t0
+    clear_sequence_cache()
+    t0 = time.perf_counter()
+    unique = len(set(records))
+    t_dedupe = time.perf_counter() - t0
+    return {
+        "configs": count,
+        "streamed": streamed,
+        "dict_bytes_per_config": mem_dicts / count,
+        "record_bytes_per_config": mem_records / count,
+        "dict_parse_s": t_dicts,
+        "record_parse_s": t_records,
+        "suite_stream_s": t_stream,
+        "build_from_records_s": t_build_cold,
+        "build_from_records_memo_s": t_build_warm,
+        "build_from_dicts_s": t_build_dicts,
+        "dedupe_s": t_dedupe,
+        "unique": unique,
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--configs", type=int, default=10000)
+    args = ap.parse_args(argv)
+    r = measure(args.configs)
+    n = r["configs"]
+    print(f"{n} configs ({r['unique']} distinct by hash, found in {r['dedupe_s'] * 1e3:.1f} ms)")
+    print(f"retained memory  : dicts {r['dict_bytes_per_config']:7.0f} B/config   "
+          f"records {r['record_bytes_per_config']:7.0f} B/config   "
+          f"({r['dict_bytes_per_config'] / r['record_bytes_per_config']:.1f}x smaller)")
+    print(f"build from element: dicts {n / r['dict_parse_s']:9.0f}/s   "
+          f"records {n / r['record_parse_s']:9.0f}/s")
+    print(f"SCPI sequence     : records {n / r['build_from_records_s']:9.0f}/s   "
+          f"memoized {n / r['build_from_records_memo_s']:9.0f}/s   "
+          f"from dicts {n / r['build_from_dicts_s']:9.0f}/s")
+    print(f"suite streamed    : {n / r['suite_stream_s']:9.0f} configs/s")
+
+if __name__ == "__main__":
+    main()
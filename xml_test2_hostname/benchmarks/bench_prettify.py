@@ -0,0 +1,44 @@
+"""Single-pass prettify_xml vs the ET.tostring -> minidom round trip.
+
+Run from the project root:  python -m benchmarks.bench_prettify [--number 2000]
+"""
+import argparse
+import timeit
+import xml.etree.ElementTree as ET
+
+from utils.xml_writer import prettify_xml, prettify_xml_minidom
+
+def sample_element(channels: int = 4) -> ET.Element:
+    # Same shape App.build_xml() produces
+    config = ET.Element("configuration")
+    channels_elem = ET.SubElement(config, "channels")
+    for n in range(1, channels + 1):
+        ch = ET.SubElement(channels_elem, "channel", number=str(n))
+        ET.SubElement(ch, "display").text = "ON"
+        ET.SubElement(ch, "label").text = f"CH{n} <probe & \"tip\">"
+        ET.SubElement(ch, "probe").text = "10"
+        ET.SubElement(ch, "scale").text = "0.5"
+    ET.SubElement(config, "display_label").text = "ON"
+    ET.SubElement(config, "time_scale").text = "0.05"
+    trig = ET.SubElement(config, "trigger")
+    for tag, val in (("mode", "EDGE"), ("source", "CHAN1"), ("level", "1.2"), ("slope", "POS")):
+        ET.SubElement(trig, tag).text = val
+    ET.SubElement(config, "trigger_command").text = "SINGLE"
+    return config
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--number", type=int, default=2000, help="serializations per timing")
+    args = ap.parse_args(argv)
+
+    elem = sample_element()
+    if prettify_xml(elem) != prettify_xml_minidom(elem):
+        raise SystemExit("output differs from the minidom path")
+    t_old = min(timeit.repeat(lambda: prettify_xml_minidom(elem), number=args.number, repeat=3))
+    t_new = min(timeit.repeat(lambda: prettify_xml(elem), number=args.number, repeat=3))
+    print(f"minidom round trip : {t_old / args.number * 1e6:8.1f} us/doc")
+    print(f"single pass        : {t_new / args.number * 1e6:8.1f} us/doc")
+    print(f"speedup            : {t_old / t_new:8.1f}x  (output identical)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""GUI startup time: process launch to first painted window.
+
+Run from the project root:  python -m benchmarks.bench_startup [--budget-s 1.5]
+
+Starts the app in a fresh interpreter, waits for the window to be mapped
+and reports the elapsed time and whether the VISA stack was already
+loaded at that point (it should not be). Exits non-zero when the window
+takes longer than the budget. Needs a display; reports a skip otherwise.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_S = 1.5
+
+_PROBE = r"""
+import json, sys, time
+t_import = time.perf_counter()
+try:
+    from gui.app_gui import App
+    app = App()
+except Exception as e:  # no display, no tkinter
+    print(json.dumps({"skipped": repr(e)}))
+    sys.exit(0)
+app.update()
+t_shown = time.perf_counter()
+visa_loaded = "pyvisa" in sys.modules
+app.destroy()
+print(json.dumps({"import_to_window_s": t_shown - t_import, "visa_loaded": visa_loaded}))
+"""
+
+def measure(timeout_s: float = 60.0) -> dict:
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", _PROBE], cwd=ROOT, capture_output=True,
+                          text=True, timeout=timeout_s)
+    wall = time.perf_counter() - t0
+    lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        return {"skipped": (proc.stderr.strip().splitlines() or ["probe failed"])[-1]}
+    result = json.loads(lines[-1])
+    if "skipped" not in result:
+        # Interpreter start-up is part of what the user waits for
+        result["launch_to_exit_s"] = wall
+    return result
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--budget-s", type=float, default=DEFAULT_BUDGET_S,
+                    help="maximum seconds from import to painted window")
+    args = ap.parse_args(argv)
+    result = measure()
+    if "skipped" in result:
+        print(f"[SKIP] {result['skipped']}")
+        return 0
+    shown = result["import_to_window_s"]
+    print(f"import -> window shown : {shown:.3f}s (budget {args.budget_s:.2f}s)")
+    print(f"launch -> exit         : {result['launch_to_exit_s']:.3f}s")
+    print(f"VISA loaded at startup : {result['visa_loaded']}")
+    if result["visa_loaded"]:
+        print("[FAIL] pyvisa was imported before the window appeared")
+        return 1
+    if shown > args.budget_s:
+        print("[FAIL] startup exceeded the budget")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
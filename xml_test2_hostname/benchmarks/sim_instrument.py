@@ -0,0 +1,74 @@
+import time
+
+from sim.scpi_server import ScopeState
+
+# In-process stand-in for a LAN scope session: every write or query costs
+# one round trip of `latency_s`, plus `per_byte_s` for each byte on the wire.
+# Messages are executed by the socket simulator's ScopeState, so replies and
+# the error queue match sim.scpi_server.
+class SimulatedInstrument:
+    def __init__(self, latency_s: float = 0.002, per_byte_s: float = 0.0,
+                 serial: str = "SIM00000"):
+        self.latency_s = latency_s
+        self.per_byte_s = per_byte_s
+        self.state = ScopeState(serial)
+        self._replies = []
+        self.timeout = 2000
+        self.read_termination = '\n'
+        self.write_termination = '\n'
+        self.messages = []
+        self.round_trips = 0
+
+    def _wire(self, msg: str):
+        self.round_trips += 1
+        self.messages.append(msg)
+        time.sleep(self.latency_s + self.per_byte_s * len(msg))
+
+    def write(self, msg: str):
+        self._wire(msg)
+        self._replies.extend(self.state.handle(msg))
+
+    def query(self, msg: str) -> str:
+        self.write(msg)
+        return self.read()
+
+    def read(self) -> str:
+        if not self._replies:
+            raise TimeoutError("No reply pending")
+        return self._replies.pop(0)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SimulatedResourceManager:
+    """Just enough of pyvisa.ResourceManager to drive discovery and apply.
+
+    Resources are raw-socket strings on 127.0.0.1 so hostname lookups stay
+    local; opening one costs `open_latency_s`.
+    """
+    def __init__(self, count: int = 8, latency_s: float = 0.002, open_latency_s: float = 0.01):
+        self.latency_s = latency_s
+        self.open_latency_s = open_latency_s
+        self.resources = tuple(f"TCPIP0::127.0.0.1::{5025 + i}::SOCKET" for i in range(count))
+        self.opened = 0
+
+    def list_resources(self, query: str = "?*::INSTR"):
+        return self.resources
+
+    def open_resource(self, resource: str, timeout: int = 2000, open_timeout: int | None = None, **kw):
+        if resource not in self.resources:
+            raise ValueError(f"unknown resource {resource}")
+        self.opened += 1
+        time.sleep(self.open_latency_s)
+        inst = SimulatedInstrument(self.latency_s, serial=f"SIM{resource.split('::')[2]:0>5}")
+        inst.timeout = timeout
+        return inst
+
+    def close(self):
+        pass
@@ -0,0 +1,386 @@
+"""Benchmark suite for the config -> SCPI -> instrument pipeline.
+
+Run from the project root:
+  python -m benchmarks.suite -o bench.json
+  python -m benchmarks.suite --only load_config --latency-ms 5
+  python -m benchmarks.suite -o new.json --compare bench.json
+
+Results are written as JSON with one record per metric, sorted by name,
+so two runs can be diffed or compared with --compare (which flags metrics
+that got slower by more than --threshold percent).
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_batching import sample_config
+from benchmarks.bench_prettify import sample_element
+from benchmarks.sim_instrument import SimulatedResourceManager
+
+SCHEMA_VERSION = 1
+BENCHMARKS = {}
+
+def benchmark(name):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+def best_of(fn, number: int, repeat: int = 3) -> float:
+    """Best mean seconds per call of fn over `repeat` runs of `number` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
+
+def metric(name: str, value: float, unit: str, **extra) -> dict:
+    return {"name": name, "value": value, "unit": unit, **extra}
+
+def write_config(path: str, channels: int = 4, label_len: int = 8):
+    elem = sample_element(channels)
+    for ch in elem.iter("label"):
+        ch.text = "L" * label_len
+    from utils.xml_writer import prettify_xml
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(prettify_xml(elem))
+
+@benchmark("load_config")
+def bench_load_config(ctx):
+    from utils.xml_loader import load_config
+    small = os.path.join(ctx.tmp, "small.xml")
+    large = os.path.join(ctx.tmp, "large.xml")
+    write_config(small, channels=4)
+    write_config(large, channels=256, label_len=200)
+    many_dir = os.path.join(ctx.tmp, "many")
+    os.makedirs(many_dir)
+    many = []
+    for i in range(ctx.files):
+        path = os.path.join(many_dir, f"test{i:05d}.xml")
+        write_config(path)
+        many.append(path)
+    t_many = best_of(lambda: [load_config(p) for p in many], 1)
+    return [
+        metric("load_config.small", best_of(lambda: load_config(small), ctx.n), "s/op"),
+        metric("load_config.large", best_of(lambda: load_config(large), max(1, ctx.n // 20)), "s/op",
+               channels=256),
+        metric("load_config.many", t_many, "s/run", files=len(many)),
+    ]
+
+@benchmark("build_scpi_sequence")
+def bench_build(ctx):
+    from config.keysight_scope import build_scpi_sequence, clear_sequence_cache
+    from config.model import ScopeConfig
+    raw = sample_config()
+    cfg = ScopeConfig.from_dict(raw)
+    # Cleared every call so this still times generation, not the memo
+    per_op = best_of(lambda: (clear_sequence_cache(), build_scpi_sequence(cfg)), ctx.n * 10)
+    memoized = best_of(lambda: build_scpi_sequence(cfg), ctx.n * 10)
+    # Plain dicts are converted per call and never memoized
+    from_dict = best_of(lambda: build_scpi_sequence(raw), ctx.n * 10)
+    return [
+        metric("build_scpi_sequence.per_config", per_op, "s/op"),
+        metric("build_scpi_sequence.throughput", 1.0 / per_op, "configs/s"),
+        metric("build_scpi_sequence.memoized", memoized, "s/op"),
+        metric("build_scpi_sequence.from_dict", from_dict, "s/op"),
+    ]
+
+@benchmark("config_model")
+def bench_config_model(ctx):
+    from benchmarks.bench_config_model import measure
+    r = measure()
+    n = r["configs"]
+    return [
+        metric("config_model.dict_bytes", r["dict_bytes_per_config"], "B/config"),
+        metric("config_model.record_bytes", r["record_bytes_per_config"], "B/config"),
+        metric("config_model.record_parse", r["record_parse_s"], "s/run", configs=n),
+        metric("config_model.build_cold", r["build_from_records_s"], "s/run", configs=n),
+        metric("config_model.build_memoized", r["build_from_records_memo_s"], "s/run", configs=n),
+        metric("config_model.dedupe", r["dedupe_s"], "s/run", configs=n, unique=r["unique"]),
+    ]
+
+@benchmark("prettify_xml")
+def bench_prettify(ctx):
+    from utils.xml_writer import prettify_xml, prettify_xml_minidom
+    elem = sample_element()
+    return [
+        metric("prettify_xml.single_pass", best_of(lambda: prettify_xml(elem), ctx.n), "s/op"),
+        metric("prettify_xml.minidom", best_of(lambda: prettify_xml_minidom(elem), ctx.n), "s/op"),
+    ]
+
+@benchmark("list_existing_tests")
+def bench_listing(ctx):
+    from utils.test_index import TestIndex
+    d = os.path.join(ctx.tmp, "listing")
+    os.makedirs(d)
+    for i in range(ctx.dir_size):
+        open(os.path.join(d, f"test{i:05d}.xml"), "w").close()
+    pattern = re.compile(r"test(\w+)\.xml", re.IGNORECASE)
+
+    def listdir_regex():
+        # The original list_existing_tests() implementation
+        return sorted(m.group(1) for m in map(pattern.fullmatch, os.listdir(d)) if m)
+
+    def cold():
+        TestIndex(d, persist_dir=None).tests()
+
+    warm_index = TestIndex(d, persist_dir=None)
+    warm_index.tests()
+    return [
+        metric("list_existing_tests.listdir_regex", best_of(listdir_regex, 5), "s/op", files=ctx.dir_size),
+        metric("list_existing_tests.index_cold", best_of(cold, 5), "s/op", files=ctx.dir_size),
+        metric("list_existing_tests.index_warm", best_of(warm_index.tests, 50), "s/op", files=ctx.dir_size),
+    ]
+
+@benchmark("search_index")
+def bench_search_index(ctx):
+    # Type-ahead over a picker-sized fleet: the slowest keystroke must fit in a frame
+    from utils.search_index import SearchIndex
+    models = ("DSOX3034T", "DSOX4154A", "MSOX6004A", "DSOS254A", "UXR0334A")
+    rows = [{"hostname": f"lab{i // 100:03d}-scope{i % 100:02d}.bench.local",
+             "idn": f"KEYSIGHT TECHNOLOGIES,{models[i % 5]},MY{i:08d},07.50.2021102830",
+             "resource": f"TCPIP0::10.{i // 65536}.{i // 256 % 256}.{i % 256}::INSTR"}
+            for i in range(ctx.dir_size * 10)]
+    text = lambda r: "\n".join((r["hostname"], r["idn"], r["resource"]))
+    sort_key = lambda r: (r["hostname"], r["resource"])
+    t0 = time.perf_counter()
+    index = SearchIndex(rows, text=text, sort_key=sort_key)
+    t_build = time.perf_counter() - t0
+    query = "lab042 dsox3"
+    times = []
+    for _ in range(ctx.repeat):
+        index.clear()
+        index.extend(rows)
+        # Type the query, backspace over it, then start a different one
+        steps = [query[:i] for i in range(1, len(query) + 1)]
+        steps += steps[-2::-1] + ["10.0.3", "my0001"]
+        for q in steps:
+            t0 = time.perf_counter()
+            index.filter(q)
+            times.append(time.perf_counter() - t0)
+    return [
+        metric("search_index.build", t_build, "s/op", rows=len(rows)),
+        metric("search_index.keystroke_worst", max(times), "s/op", rows=len(rows)),
+        metric("search_index.keystroke_mean", sum(times) / len(times), "s/op", rows=len(rows)),
+    ]
+
+def _simulated_manager(ctx):
+    from core.sessions import SessionManager
+    manager = SessionManager()
+    manager.set_resource_manager(SimulatedResourceManager(
+        count=ctx.instruments, latency_s=ctx.latency_s, open_latency_s=ctx.open_latency_s))
+    return manager
+
+@benchmark("apply_xml_to_scope")
+def bench_apply(ctx):
+    from core.sessions import set_session_manager
+    from core.xml_ro_scpi import apply_xml_to_scope
+    path = os.path.join(ctx.tmp, "test001.xml")
+    write_config(path)
+    manager = _simulated_manager(ctx)
+    res = manager.list_resources()[0]
+    saved = set_session_manager(manager)
+    try:
+        cold = best_of(lambda: (manager.close_all(), apply_xml_to_scope(path, res)), 1, repeat=ctx.repeat)
+        apply_xml_to_scope(path, res)
+        pooled = best_of(lambda: apply_xml_to_scope(path, res), ctx.repeat)
+        batched = best_of(lambda: apply_xml_to_scope(path, res, batch=True), ctx.repeat)
+        apply_xml_to_scope(path, res, diff=True)
+        diffed = best_of(lambda: apply_xml_to_scope(path, res, diff=True), ctx.repeat)
+    finally:
+        manager.close_all()
+        set_session_manager(saved)
+    return [
+        metric("apply_xml_to_scope.new_session", cold, "s/op", latency_ms=ctx.latency_ms),
+        metric("apply_xml_to_scope.pooled", pooled, "s/op", latency_ms=ctx.latency_ms),
+        metric("apply_xml_to_scope.batched", batched, "s/op", latency_ms=ctx.latency_ms),
+        metric("apply_xml_to_scope.diff_unchanged", diffed, "s/op", latency_ms=ctx.latency_ms),
+    ]
+
+@benchmark("discover_instruments")
+def bench_discovery(ctx):
+    from core.sessions import set_session_manager
+    from utils.discovery import discover_instruments
+    manager = _simulated_manager(ctx)
+    saved = set_session_manager(manager)
+    try:
+        def scan():
+            manager.close_all()
+            rows = discover_instruments(use_cache=False)
+            assert len(rows) == ctx.instruments, rows
+        elapsed = best_of(scan, 1, repeat=ctx.repeat)
+    finally:
+        manager.close_all()
+        set_session_manager(saved)
+    return [metric("discover_instruments.scan", elapsed, "s/op",
+                   instruments=ctx.instruments, latency_ms=ctx.latency_ms)]
+
+@benchmark("fleet")
+def bench_fleet(ctx):
+    # Real pyvisa sessions against simulated ::SOCKET scopes on localhost
+    import pyvisa  # noqa: F401  (skip cleanly when the VISA stack is absent)
+    from core.fanout import apply_to_many
+    from core.sessions import SessionManager, set_session_manager
+    from sim.scpi_server import start_fleet, stop_fleet
+    from utils.discovery import discover_instruments
+    path = os.path.join(ctx.tmp, "test001.xml")
+    write_config(path)
+    fleet = start_fleet(ctx.instruments, latency_s=ctx.latency_s, jitter_s=ctx.latency_s / 2)
+    resources = [s.resource for s in fleet]
+    manager = SessionManager()
+    saved = set_session_manager(manager)
+    try:
+        t0 = time.perf_counter()
+        rows = discover_instruments(use_cache=False, resources=resources)
+        t_scan = time.perf_counter() - t0
+        answered = sum(1 for r in rows if not r["idn"].startswith("("))
+        t0 = time.perf_counter()
+        report = apply_to_many(path, resources, max_workers=ctx.instruments, batch=True)
+        t_apply = time.perf_counter() - t0
+        ok = sum(1 for r in report if r["ok"])
+    finally:
+        manager.close_all()
+        set_session_manager(saved)
+        stop_fleet(fleet)
+    return [
+        metric("fleet.discover", t_scan, "s/op", instruments=len(resources), answered=answered),
+        metric("fleet.apply_to_many", t_apply, "s/op", instruments=len(resources), ok=ok),
+    ]
+
+@benchmark("fleet_async")
+def bench_fleet_async(ctx):
+    # Same fleet driven from one event loop over the asyncio socket transport
+    import asyncio
+    from core.async_socket import AsyncSocketPool, apply_to_many_async
+    from sim.scpi_server import start_fleet, stop_fleet
+    path = os.path.join(ctx.tmp, "test001.xml")
+    write_config(path)
+    fleet = start_fleet(ctx.instruments, latency_s=ctx.latency_s, jitter_s=ctx.latency_s / 2)
+    resources = [s.resource for s in fleet]
+
+    async def run():
+        async with AsyncSocketPool() as pool:
+            t0 = time.perf_counter()
+            cold = await apply_to_many_async(path, resources, pool, batch=True)
+            t_cold = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            warm = await apply_to_many_async(path, resources, pool, batch=True)
+            return t_cold, time.perf_counter() - t0, sum(1 for r in cold + warm if r["ok"])
+
+    try:
+        t_cold, t_warm, ok = asyncio.run(run())
+    finally:
+        stop_fleet(fleet)
+    return [
+        metric("fleet_async.apply_cold", t_cold, "s/op", instruments=len(resources)),
+        metric("fleet_async.apply_warm", t_warm, "s/op", instruments=len(resources), ok=ok),
+    ]
+
+@benchmark("startup")
+def bench_startup(ctx):
+    from benchmarks.bench_startup import measure
+    result = measure()
+    if "skipped" in result:
+        raise ImportError(result["skipped"], name="display")
+    return [metric("startup.import_to_window", result["import_to_window_s"], "s/op",
+                   visa_loaded=result["visa_loaded"])]
+
+class Context:
+    def __init__(self, args, tmp):
+        self.tmp = tmp
+        self.n = args.number
+        self.repeat = args.repeat
+        self.files = args.files
+        self.dir_size = args.dir_size
+        self.instruments = args.instruments
+        self.latency_ms = args.latency_ms
+        self.latency_s = args.latency_ms / 1000.0
+        self.open_latency_s = args.open_latency_ms / 1000.0
+
+def run(args) -> dict:
+    results = []
+    skipped = {}
+    tmp = tempfile.mkdtemp(prefix="xml_test2_bench_")
+    try:
+        for name, fn in BENCHMARKS.items():
+            if args.only and not any(name.startswith(o) for o in args.only):
+                continue
+            ctx = Context(args, os.path.join(tmp, name))
+            os.makedirs(ctx.tmp)
+            try:
+                results.extend(fn(ctx))
+            except ImportError as e:
+                skipped[name] = f"missing dependency: {e.name}"
+            print(f"[BENCH] {name} done", file=sys.stderr)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        "schema": SCHEMA_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {k: getattr(args, k) for k in
+                       ("number", "repeat", "files", "dir_size", "instruments",
+                        "latency_ms", "open_latency_ms")},
+        "results": sorted(results, key=lambda r: r["name"]),
+        "skipped": skipped,
+    }
+
+def _lower_is_better(unit: str) -> bool:
+    return not unit.endswith("/s")
+
+def compare(current: dict, baseline: dict, threshold_pct: float) -> int:
+    base = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = 0
+    for r in current["results"]:
+        b = base.get(r["name"])
+        if b is None or not b["value"]:
+            print(f"{r['name']:45s} {r['value']:12.6g} {r['unit']:10s}  (new)")
+            continue
+        change = (r["value"] - b["value"]) / b["value"] * 100.0
+        worse = change if _lower_is_better(r["unit"]) else -change
+        flag = "  REGRESSION" if worse > threshold_pct else ""
+        regressions += bool(flag)
+        print(f"{r['name']:45s} {r['value']:12.6g} {r['unit']:10s} {change:+7.1f}%{flag}")
+    return regressions
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pipeline benchmark suite.",
+                                 formatter_class=argparse.RawDescriptionHelpFormatter,
+                                 epilog=__doc__)
+    ap.add_argument("-o", "--out", help="write results JSON here")
+    ap.add_argument("--compare", metavar="BASELINE", help="compare against an earlier results file")
+    ap.add_argument("--threshold", type=float, default=10.0, help="regression threshold (%%)")
+    ap.add_argument("--only", action="append", default=[], help="run benchmarks with this prefix")
+    ap.add_argument("--number", type=int, default=200, help="calls per timing for micro benchmarks")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--files", type=int, default=200, help="files for load_config.many")
+    ap.add_argument("--dir-size", type=int, default=5000, help="files for list_existing_tests")
+    ap.add_argument("--instruments", type=int, default=16, help="simulated instruments")
+    ap.add_argument("--latency-ms", type=float, default=2.0, help="simulated round-trip latency")
+    ap.add_argument("--open-latency-ms", type=float, default=20.0, help="simulated session open time")
+    args = ap.parse_args(argv)
+
+    current = run(args)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=1, sort_keys=True)
+    for name, reason in current["skipped"].items():
+        print(f"[SKIP] {name}: {reason}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        return 1 if compare(current, baseline, args.threshold) else 0
+    for r in current["results"]:
+        print(f"{r['name']:45s} {r['value']:12.6g} {r['unit']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,32 +1,50 @@
-def build_scpi_sequence(cfg: dict):
+from functools import lru_cache
+
+from config.model import ScopeConfig
+
+# Sequences are memoized per config value; ScopeConfig hashes by content
+SEQUENCE_CACHE_SIZE = 4096
+
+def build_scpi_sequence(cfg):
+    """SCPI commands for a config (ScopeConfig or the equivalent dict)."""
+    if isinstance(cfg, ScopeConfig):
+        return list(_sequence(cfg))
+    # A dict converted on the fly would never be seen again; don't memoize it
+    return list(_sequence.__wrapped__(ScopeConfig.from_dict(cfg)))
+
+def clear_sequence_cache():
+    _sequence.cache_clear()
+
+@lru_cache(maxsize=SEQUENCE_CACHE_SIZE)
+def _sequence(cfg: ScopeConfig) -> tuple:
     cmds = []
-    cmds.append("DISP:LAB " + ("ON" if cfg.get("display_label", False) else "OFF"))
+    cmds.append("DISP:LAB " + ("ON" if cfg.display_label else "OFF"))
 
-    ts = cfg.get("time_scale", "").strip()
+    ts = cfg.time_scale
     if ts:
         cmds.append(f":TIM:SCAL {ts}")
 
-    for ch in cfg.get("channels", []):
-        n = ch.get("number", 1)
-        on = ch.get("display", False)
+    for ch in cfg.channels:
+        n = ch.number
+        on = ch.display
         cmds.append(f":CHAN{n}:DISP {'ON' if on else 'OFF'}")
         if on:
-            if ch.get("scale"):
-                cmds.append(f":CHAN{n}:SCAL {ch['scale']}")
-            if ch.get("label"):
-                lab = ch['label'].replace("'", "\'")
+            if ch.scale:
+                cmds.append(f":CHAN{n}:SCAL {ch.scale}")
+            if ch.label:
+                lab = ch.label.replace("'", "\'")
                 cmds.append(f":CHAN{n}:LAB '{lab}'")
-            if ch.get("probe"):
-                cmds.append(f":CHAN{n}:PROB {ch['probe']}")
+            if ch.probe:
+                cmds.append(f":CHAN{n}:PROB {ch.probe}")
             # Unit handling differs by model; uncomment if supported:
-            # if ch.get("unit") in ("VOLT", "AMP"):
-            #     cmds.append(f":CHAN{n}:UNIT {ch['unit']}")
+            # if ch.unit in ("VOLT", "AMP"):
+            #     cmds.append(f":CHAN{n}:UNIT {ch.unit}")
 
-    trig = cfg.get("trigger", {})
-    mode = trig.get("mode", "EDGE")
-    src = trig.get("source", "CHAN1")
-    lvl = trig.get("level", "")
-    slope = trig.get("slope", "POS")
+    trig = cfg.trigger
+    mode = trig.mode
+    src = trig.source
+    lvl = trig.level
+    slope = trig.slope
 
     cmds.append(f":TRIG:MODE {mode}")
     cmds.append(f":TRIG:{mode}:SOUR {src}")
@@ -35,8 +53,8 @@ def build_scpi_sequence(cfg: dict):
     if slope:
         cmds.append(f":TRIG:{mode}:SLOP {slope}")
 
-    tcmd = cfg.get("trigger_command", "SINGLE")
+    tcmd = cfg.trigger_command
     if tcmd:
         cmds.append(tcmd)
 
-    return cmds
+    return tuple(cmds)
@@ -0,0 +1,182 @@
+import sys
+from collections.abc import Mapping
+from operator import attrgetter
+
+# Compact, immutable config records. A suite held in memory for scheduling
+# or diffing used to be one dict per config plus a dict per channel and the
+# trigger; these records keep the same fields in __slots__, share repeated
+# strings (modes, sources, slopes, scales…) through sys.intern, and hash by
+# value so a config can key a cache. They are read-only Mappings with the
+# old dict keys, so cfg["trigger"]["mode"] and cfg.get("channels", [])
+# keep working. Being immutable, cfg["channels"] is a tuple of records
+# rather than a list of dicts: code that appended to or edited it in place
+# should use replace()/with_channel(), or to_dict() for a plain, mutable
+# copy (e.g. for JSON).
+TRIGGER_MODES = ("EDGE", "RUNT", "BUS", "GLITCH", "PULSE", "VIDEO", "PATTERN")
+TRIGGER_SOURCES = ("CHAN1", "CHAN2", "CHAN3", "CHAN4", "EXT", "LINE")
+TRIGGER_SLOPES = ("POS", "NEG")
+CHANNEL_UNITS = ("", "AMP", "VOLT")
+CHANNEL_NUMBERS = (1, 2, 3, 4)
+
+_intern = sys.intern
+
+# Values are kept verbatim, as build_scpi_sequence always sent them (the XML
+# parser already strips and upper-cases); interning only shares the storage.
+# Enum-like fields (mode, source, slope, unit) repeat the most, so equal
+# values end up as one object.
+def _text(value) -> str:
+    if value is None:
+        return ""
+    return _intern(value if type(value) is str else str(value))
+
+def _optional(value) -> str:
+    # Settings the builder skips when empty; a falsy value such as a
+    # numeric 0 level was always skipped too, so it stays empty here
+    return _text(value) if value else ""
+
+class _Record(Mapping):
+    __slots__ = ("_hash",)
+    _fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._values = attrgetter(*cls._fields)
+
+    def _init(self, **values):
+        # __setattr__ is blocked, so fields are set once here
+        object.__setattr__(self, "_hash", None)
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    # Mapping view with the keys load_config has always returned
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self is other or (hash(self) == hash(other) and self._values(self) == other._values(other))
+        if isinstance(other, Mapping):
+            return self.to_dict() == _plain(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __hash__(self):
+        h = self._hash
+        if h is None:
+            h = hash((type(self).__name__,) + self._values(self))
+            object.__setattr__(self, "_hash", h)
+        return h
+
+    def __reduce__(self):
+        return (type(self), self._values(self))
+
+    def __repr__(self):
+        args = ", ".join(f"{f}={getattr(self, f)!r}" for f in self._fields)
+        return f"{type(self).__name__}({args})"
+
+    def replace(self, **changes):
+        """Copy with some fields changed."""
+        values = {f: getattr(self, f) for f in self._fields}
+        unknown = set(changes) - set(values)
+        if unknown:
+            raise TypeError(f"{type(self).__name__} has no field(s) {sorted(unknown)}")
+        values.update(changes)
+        return type(self)(**values)
+
+    @classmethod
+    def _from_mapping(cls, values):
+        # Dict callers may carry extra keys; the old dict path ignored them
+        if isinstance(values, cls):
+            return values
+        return cls(**{k: v for k, v in values.items() if k in cls._fields})
+
+    def to_dict(self) -> dict:
+        return {f: _plain(getattr(self, f)) for f in self._fields}
+
+def _plain(value):
+    if isinstance(value, _Record):
+        return value.to_dict()
+    if isinstance(value, Mapping):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+class ChannelConfig(_Record):
+    __slots__ = ("number", "display", "label", "probe", "scale", "unit")
+    _fields = __slots__
+
+    def __init__(self, number=1, display=False, label="", probe="", scale="", unit=""):
+        self._init(number=int(number), display=bool(display), label=_optional(label),
+                   probe=_optional(probe), scale=_optional(scale), unit=_optional(unit))
+
+class TriggerConfig(_Record):
+    __slots__ = ("mode", "source", "level", "slope")
+    _fields = __slots__
+
+    def __init__(self, mode="EDGE", source="CHAN1", level="", slope="POS"):
+        self._init(mode=_text(mode), source=_text(source), level=_optional(level),
+                   slope=_optional(slope))
+
+class ScopeConfig(_Record):
+    __slots__ = ("channels", "display_label", "time_scale", "trigger", "trigger_command")
+    _fields = __slots__
+
+    def __init__(self, channels=(), display_label=False, time_scale="", trigger=None,
+                 trigger_command="SINGLE"):
+        if trigger is None:
+            trigger = TriggerConfig()
+        else:
+            trigger = TriggerConfig._from_mapping(trigger)
+        self._init(channels=tuple(ChannelConfig._from_mapping(ch) for ch in channels),
+                   display_label=bool(display_label),
+                   time_scale=_optional(time_scale.strip() if type(time_scale) is str
+                                        else time_scale),
+                   trigger=trigger, trigger_command=_optional(trigger_command))
+
+    @classmethod
+    def from_dict(cls, cfg) -> "ScopeConfig":
+        """Record for a config dict (or return cfg if it already is one)."""
+        if isinstance(cfg, cls):
+            return cfg
+        return cls(channels=cfg.get("channels", ()),
+                   display_label=cfg.get("display_label", False),
+                   time_scale=cfg.get("time_scale", ""),
+                   trigger=cfg.get("trigger") or None,
+                   trigger_command=cfg.get("trigger_command", "SINGLE"))
+
+    def channel(self, number: int) -> ChannelConfig | None:
+        for ch in self.channels:
+            if ch.number == number:
+                return ch
+        return None
+
+    def with_channel(self, number: int, **changes) -> "ScopeConfig":
+        """Copy with channel `number` changed; KeyError if there is no such channel."""
+        channels = list(self.channels)
+        for i, ch in enumerate(channels):
+            if ch.number == number:
+                channels[i] = ch.replace(**changes)
+                return self.replace(channels=tuple(channels))
+        raise KeyError(number)
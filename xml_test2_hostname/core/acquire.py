@@ -0,0 +1,175 @@
+import ctypes
+import re
+import time
+
+import numpy as np
+
+from core.compile_cache import get_compile_cache
+from core.sessions import get_session_manager
+from core.xml_ro_scpi import apply_xml_to_scope
+from utils.trace import span
+
+# Waveform capture after an apply: wait for the trigger armed by the
+# config's trigger_command, then fetch each displayed channel as an
+# IEEE-488.2 definite-length block (#<n><len><data>). Blocks are read in
+# fixed-size chunks into a preallocated raw sample buffer, which is reused
+# across channels, and scaled to volts in place with the preamble, so
+# memory per capture is the raw buffer plus one output array per channel
+# however long the record is. With a ctypes VISA library (NI, Keysight)
+# viRead writes into the buffer itself; other backends (pyvisa-py) only
+# return bytes, so there each chunk is copied once into the buffer.
+CHUNK_BYTES = 1 << 20
+TRIGGER_TIMEOUT_S = 10.0
+TRIGGER_POLL_S = 0.01
+CAPTURE_TIMEOUT_MS = 10000
+# :WAV:FORM -> (raw dtype, bytes per sample); data is requested signed
+_FORMATS = {"BYTE": (np.int8, 1), "WORD": (np.int16, 2)}
+_CHAN_ON_RE = re.compile(r":?CHAN(\d+):DISP\s+(?:ON|1)\b", re.IGNORECASE)
+
+class Waveform:
+    """One channel's samples in volts plus the preamble's time axis."""
+    __slots__ = ("channel", "volts", "x_increment", "x_origin", "x_reference")
+
+    def __init__(self, channel: int, volts, x_increment: float, x_origin: float,
+                 x_reference: float):
+        self.channel = channel
+        self.volts = volts
+        self.x_increment = x_increment
+        self.x_origin = x_origin
+        self.x_reference = x_reference
+
+    def __len__(self):
+        return len(self.volts)
+
+    def times(self):
+        # Built on demand; most callers only need the samples
+        return self.x_origin + (np.arange(len(self.volts)) - self.x_reference) * self.x_increment
+
+def displayed_channels(cfg: dict) -> list:
+    return [int(ch.get("number", 1)) for ch in cfg.get("channels", []) if ch.get("display")]
+
+def channels_in(cmds) -> list:
+    """Channels a built SCPI sequence turns on, for suites that carry no cfg."""
+    return [int(m.group(1)) for m in map(_CHAN_ON_RE.match, cmds) if m]
+
+def parse_preamble(reply: str) -> dict:
+    """:WAV:PRE? -> format, type, points, count, x/y increment, origin, reference."""
+    fields = [f.strip() for f in reply.split(",")]
+    if len(fields) < 10:
+        raise RuntimeError(f"Malformed waveform preamble: {reply!r}")
+    return {
+        "points": int(float(fields[2])),
+        "x_increment": float(fields[4]), "x_origin": float(fields[5]),
+        "x_reference": float(fields[6]),
+        "y_increment": float(fields[7]), "y_origin": float(fields[8]),
+        "y_reference": float(fields[9]),
+    }
+
+def wait_for_trigger(inst, timeout_s: float = TRIGGER_TIMEOUT_S, poll_s: float = TRIGGER_POLL_S):
+    """Poll the trigger event register (:TER?) until the armed acquisition fires."""
+    deadline = time.monotonic() + timeout_s
+    with span("wait_trigger"):
+        while True:
+            if int(float(inst.query(":TER?").strip() or 0)):
+                return
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"No trigger within {timeout_s:g}s")
+            time.sleep(poll_s)
+
+def _visa_reader(inst):
+    # viRead straight into buf; pyvisa's own read() goes through a temporary buffer
+    lib = getattr(getattr(inst, "visalib", None), "lib", None)
+    if lib is None or not hasattr(lib, "viRead"):
+        return None
+    session = inst.session
+
+    def read(buf, pos, count):
+        target = (ctypes.c_char * count).from_buffer(buf, pos)
+        got = ctypes.c_uint32()
+        # pyvisa's errcheck on lib raises VisaIOError for error statuses
+        lib.viRead(session, target, count, ctypes.byref(got))
+        return got.value
+    return read
+
+def _copying_reader(inst):
+    def read(buf, pos, count):
+        chunk = inst.read_bytes(count)
+        buf[pos:pos + len(chunk)] = np.frombuffer(chunk, dtype=np.uint8)
+        return len(chunk)
+    return read
+
+def read_block_into(inst, buf, chunk_bytes: int = CHUNK_BYTES) -> int:
+    """Read one definite-length binary block into the uint8 array buf; return its length.
+
+    The data lands in buf directly for ctypes VISA libraries; with other
+    backends each chunk is copied once from bytes.
+    """
+    head = inst.read_bytes(2)
+    if head[:1] != b"#" or not head[1:2].isdigit() or head[1:2] == b"0":
+        raise RuntimeError(f"Expected a definite-length block, got {head!r}")
+    length = int(inst.read_bytes(int(head[1:2])))
+    if length > len(buf):
+        raise RuntimeError(f"Block of {length} bytes exceeds the {len(buf)}-byte buffer")
+    read = _visa_reader(inst) or _copying_reader(inst)
+    pos = 0
+    while pos < length:
+        pos += read(buf, pos, min(chunk_bytes, length - pos))
+    # Message terminator after the block
+    inst.read_bytes(1)
+    return length
+
+def fetch_waveforms(inst, channels, fmt: str = "WORD", points: int | None = None,
+                    dtype=np.float64, chunk_bytes: int = CHUNK_BYTES) -> list:
+    """Fetch channels (numbers) from an open session as a list of Waveform."""
+    raw_dtype, width = _FORMATS[fmt]
+    setup = f":WAV:FORM {fmt};:WAV:BYT LSBF;:WAV:UNS 0"
+    if points:
+        setup += f";:WAV:POIN:MODE RAW;:WAV:POIN {points}"
+    inst.write(setup)
+    buf = None
+    waveforms = []
+    for n in channels:
+        with span("fetch", channel=n):
+            inst.write(f":WAV:SOUR CHAN{n}")
+            pre = parse_preamble(inst.query(":WAV:PRE?"))
+            need = pre["points"] * width
+            if buf is None or len(buf) < need:
+                buf = np.empty(need, dtype=np.uint8)
+            inst.write(":WAV:DATA?")
+            length = read_block_into(inst, buf, chunk_bytes)
+            raw = buf[:length].view(np.dtype(raw_dtype).newbyteorder("<"))
+            volts = np.empty(len(raw), dtype=dtype)
+            np.subtract(raw, pre["y_reference"], out=volts, casting="unsafe")
+            volts *= pre["y_increment"]
+            volts += pre["y_origin"]
+            waveforms.append(Waveform(n, volts, pre["x_increment"], pre["x_origin"],
+                                      pre["x_reference"]))
+    return waveforms
+
+def capture(resource: str, channels, fmt: str = "WORD", points: int | None = None,
+            dtype=np.float64, trigger_timeout_s: float = TRIGGER_TIMEOUT_S,
+            wait_trigger: bool = True) -> list:
+    """Wait for the trigger on resource and fetch channels as Waveforms."""
+    manager = get_session_manager()
+
+    def acquire(inst):
+        previous = inst.timeout
+        # Multi-megapoint blocks take longer than a config write
+        inst.timeout = max(previous or 0, CAPTURE_TIMEOUT_MS)
+        try:
+            if wait_trigger:
+                wait_for_trigger(inst, trigger_timeout_s)
+            return fetch_waveforms(inst, channels, fmt, points, dtype)
+        finally:
+            inst.timeout = previous
+
+    with span("capture", resource=resource):
+        return manager.run(resource, acquire)
+
+def apply_and_capture(xml_path: str, resource: str, fmt: str = "WORD",
+                      points: int | None = None, dtype=np.float64,
+                      trigger_timeout_s: float = TRIGGER_TIMEOUT_S, **apply_kwargs) -> list:
+    """Apply xml_path, then capture its displayed channels on the same session."""
+    apply_xml_to_scope(xml_path, resource, **apply_kwargs)
+    cfg, _ = get_compile_cache().compile(xml_path)
+    return capture(resource, displayed_channels(cfg), fmt, points, dtype, trigger_timeout_s)
@@ -0,0 +1,260 @@
+import asyncio
+import re
+import time
+from functools import partial
+
+from core.batching import MAX_MESSAGE_BYTES, pack_commands, send_batched, send_individually
+from core.compile_cache import get_compile_cache
+from core.diff import get_state_cache
+from core.errcheck import MAX_ERRORS, ScpiError, bisect_errors, is_no_error
+from core.fanout import TARGET_TIMEOUT_S
+from core.xml_ro_scpi import apply_commands
+from utils.trace import span
+
+# asyncio transport for raw-socket SCPI (TCPIP::host::port::SOCKET).
+# Commands are written back to back without waiting for each one and the
+# sequence is closed by a single *OPC? query, so an apply costs one round
+# trip however many commands it has, and one event loop can drive dozens
+# of scopes at once. Terminations are handled here ('\n' both ways), as
+# pyvisa needs them set by hand for socket resources. Other resources
+# (::INSTR, USB, GPIB) run through the pyvisa path in a worker thread.
+SOCKET_RE = re.compile(r"TCPIP\d*::([^:]+)::(\d+)::SOCKET", re.IGNORECASE)
+WRITE_TERMINATION = b"\n"
+READ_TERMINATION = b"\n"
+DEFAULT_TIMEOUT_S = 2.0
+CONNECT_TIMEOUT_S = 2.0
+
+def socket_address(resource: str):
+    """(host, port) of a ::SOCKET resource, or None for anything else."""
+    m = SOCKET_RE.fullmatch(resource.strip())
+    return (m.group(1), int(m.group(2))) if m else None
+
+class AsyncScpiSocket:
+    def __init__(self, reader, writer, timeout_s: float = DEFAULT_TIMEOUT_S):
+        self._reader = reader
+        self._writer = writer
+        self.timeout_s = timeout_s
+
+    @classmethod
+    async def open(cls, host: str, port: int, timeout_s: float = DEFAULT_TIMEOUT_S):
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port),
+                                                CONNECT_TIMEOUT_S)
+        return cls(reader, writer, timeout_s)
+
+    @property
+    def closed(self) -> bool:
+        return self._writer.is_closing() or self._reader.at_eof()
+
+    def write(self, message: str):
+        """Queue message for sending; does not wait for the scope."""
+        self._writer.write(message.encode("ascii") + WRITE_TERMINATION)
+
+    async def drain(self):
+        await self._writer.drain()
+
+    async def query(self, message: str) -> str:
+        self.write(message)
+        await self._writer.drain()
+        line = await asyncio.wait_for(self._reader.readuntil(READ_TERMINATION), self.timeout_s)
+        return line.decode("ascii", "replace").strip()
+
+    async def read_bytes(self, count: int) -> bytes:
+        return await asyncio.wait_for(self._reader.readexactly(count), self.timeout_s)
+
+    def abort(self):
+        """Close without waiting, e.g. when replies may still be in flight."""
+        self._writer.close()
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except OSError:
+            pass
+
+class _BlockingView:
+    """pyvisa-like write/query over an AsyncScpiSocket, for worker threads.
+
+    Lets the synchronous error bisection in core.errcheck drive a socket
+    owned by the event loop.
+    """
+    def __init__(self, conn: AsyncScpiSocket, loop):
+        self._conn = conn
+        self._loop = loop
+
+    def write(self, message: str):
+        self._loop.call_soon_threadsafe(self._conn.write, message)
+
+    def query(self, message: str) -> str:
+        return asyncio.run_coroutine_threadsafe(self._conn.query(message), self._loop).result()
+
+class AsyncSocketPool:
+    """Open connections to ::SOCKET resources, reused across applies on one loop."""
+    def __init__(self, timeout_s: float = DEFAULT_TIMEOUT_S):
+        self.timeout_s = timeout_s
+        self._conns = {}     # resource -> AsyncScpiSocket
+        self._opened = {}    # resource -> connections opened so far
+        self._locks = {}     # resource -> asyncio.Lock (one apply at a time)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close_all()
+        return False
+
+    def lock(self, resource: str) -> asyncio.Lock:
+        return self._locks.setdefault(resource, asyncio.Lock())
+
+    def generation(self, resource: str):
+        # Distinct from SessionManager generations, so diff state recorded
+        # over pyvisa is never mistaken for this connection's and vice versa
+        return ("socket", id(self), self._opened.get(resource, 0))
+
+    async def get(self, resource: str):
+        """(connection, reused) for resource, opening one if needed."""
+        conn = self._conns.get(resource)
+        if conn is not None and not conn.closed:
+            return conn, True
+        host, port = socket_address(resource)
+        with span("open", resource=resource):
+            conn = await AsyncScpiSocket.open(host, port, self.timeout_s)
+        self._conns[resource] = conn
+        self._opened[resource] = self._opened.get(resource, 0) + 1
+        return conn, False
+
+    def discard(self, resource: str):
+        conn = self._conns.pop(resource, None)
+        if conn is not None:
+            conn.abort()
+
+    async def close_all(self):
+        conns = list(self._conns.values())
+        self._conns.clear()
+        await asyncio.gather(*(c.close() for c in conns), return_exceptions=True)
+
+async def read_errors_async(conn: AsyncScpiSocket, limit: int = MAX_ERRORS) -> list:
+    errors = []
+    for _ in range(limit):
+        reply = await conn.query("SYST:ERR?")
+        if is_no_error(reply):
+            break
+        errors.append(reply)
+    return errors
+
+async def _send(conn, pool, resource, cmds, batch, max_message_bytes, diff, check_errors) -> list:
+    states = get_state_cache()
+    generation = pool.generation(resource)
+    to_send = states.plan(resource, cmds, generation) if diff else list(cmds)
+    failures = []
+    try:
+        messages = pack_commands(to_send, max_message_bytes) if batch else to_send
+        if check_errors:
+            conn.write("*CLS")
+        for msg in messages:
+            conn.write(msg)
+        # One round trip confirms every pipelined write was executed
+        with span("*OPC?", "scpi"):
+            reply = await conn.query("*OPC?")
+        try:
+            done = int(reply) == 1
+        except ValueError:
+            done = False
+        if not done:
+            raise RuntimeError(f"Unexpected *OPC? reply: {reply!r}")
+        if check_errors:
+            errors = await read_errors_async(conn)
+            if errors:
+                # Rare path: reuse the synchronous bisection from a thread
+                view = _BlockingView(conn, asyncio.get_running_loop())
+                if batch:
+                    transmit = partial(send_batched, max_bytes=max_message_bytes)
+                else:
+                    transmit = send_individually
+                failures = await asyncio.to_thread(bisect_errors, view, to_send, transmit, errors)
+    except BaseException:
+        states.forget(resource)
+        raise
+    if failures:
+        states.forget(resource)
+    else:
+        states.commit(resource, cmds, generation)
+    return failures
+
+async def apply_commands_async(cmds, resource: str, pool: AsyncSocketPool | None = None,
+                               batch: bool = False, max_message_bytes: int = MAX_MESSAGE_BYTES,
+                               diff: bool = False, check_errors: bool = False):
+    """Async apply_commands(); ::SOCKET resources use the asyncio transport.
+
+    Without a pool a connection is opened for this call and closed after.
+    """
+    if socket_address(resource) is None:
+        return await asyncio.to_thread(apply_commands, cmds, resource, batch=batch,
+                                       max_message_bytes=max_message_bytes, diff=diff,
+                                       check_errors=check_errors)
+    own_pool = pool is None
+    if own_pool:
+        pool = AsyncSocketPool()
+    try:
+        with span("apply", resource=resource):
+            async with pool.lock(resource):
+                conn, reused = await pool.get(resource)
+                args = (resource, cmds, batch, max_message_bytes, diff, check_errors)
+                try:
+                    try:
+                        failures = await _send(conn, pool, *args)
+                    except (OSError, EOFError) as e:
+                        # A slow reply is not a dead link; retrying would send it twice
+                        if not reused or isinstance(e, (TimeoutError, asyncio.TimeoutError)):
+                            raise
+                        # The pooled connection went stale; reconnect once
+                        pool.discard(resource)
+                        conn, _ = await pool.get(resource)
+                        failures = await _send(conn, pool, *args)
+                except BaseException:
+                    # Errors and cancellation (a fan-out timeout) can leave
+                    # replies in flight; never hand this connection out again
+                    pool.discard(resource)
+                    raise
+    finally:
+        if own_pool:
+            await pool.close_all()
+    if failures:
+        raise ScpiError(resource, failures)
+    return True
+
+async def apply_xml_to_scope_async(xml_path: str, resource: str,
+                                   pool: AsyncSocketPool | None = None, **apply_kwargs):
+    _, cmds = get_compile_cache().compile(xml_path)
+    return await apply_commands_async(cmds, resource, pool, **apply_kwargs)
+
+async def apply_commands_to_many_async(cmds, resources, pool: AsyncSocketPool | None = None,
+                                       timeout_s: float | None = TARGET_TIMEOUT_S,
+                                       **apply_kwargs) -> list:
+    """Apply cmds to every resource on this event loop; report as core.fanout.fan_out()."""
+    resources = list(dict.fromkeys(resources))
+    own_pool = pool is None
+    if own_pool:
+        pool = AsyncSocketPool()
+
+    async def one(res):
+        t0 = time.monotonic()
+        try:
+            await asyncio.wait_for(apply_commands_async(cmds, res, pool, **apply_kwargs), timeout_s)
+            return {"resource": res, "ok": True, "error": "", "elapsed_s": time.monotonic() - t0}
+        except asyncio.TimeoutError:
+            error = f"timed out after {timeout_s:g}s"
+        except Exception as e:
+            error = str(e)
+        return {"resource": res, "ok": False, "error": error, "elapsed_s": time.monotonic() - t0}
+
+    try:
+        return list(await asyncio.gather(*(one(res) for res in resources)))
+    finally:
+        if own_pool:
+            await pool.close_all()
+
+async def apply_to_many_async(xml_path: str, resources, pool: AsyncSocketPool | None = None,
+                              timeout_s: float | None = TARGET_TIMEOUT_S, **apply_kwargs) -> list:
+    _, cmds = get_compile_cache().compile(xml_path)
+    return await apply_commands_to_many_async(cmds, resources, pool, timeout_s, **apply_kwargs)
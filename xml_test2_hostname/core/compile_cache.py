@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from config.keysight_scope import build_scpi_sequence
+from config.model import ScopeConfig
+from utils.trace import span
+from utils.xml_loader import load_config
+
+# Parsed config + SCPI sequence per test file, so repeated applies and
+# batch runs skip ElementTree and build_scpi_sequence entirely. Entries are
+# validated against the file's (mtime, size, inode) or, with use_hash, its
+# content digest; writers that may land within one mtime tick (the GUI's
+# Save/Clone) call invalidate() explicitly.
+MAX_ENTRIES = 256
+_STORE_VERSION = 1
+
+class CompileCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, disk_dir: str | None = None,
+                 use_hash: bool = False):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.use_hash = use_hash
+        self._lru = OrderedDict()   # abspath -> (signature, cfg, cmds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _signature(self, path: str):
+        if self.use_hash:
+            with open(path, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+    def _disk_path(self, key: str) -> str:
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json"
+        return os.path.join(self.disk_dir, name)
+
+    def _load_disk(self, key: str, signature):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != _STORE_VERSION or data.get("signature") != signature:
+            return None
+        return ScopeConfig.from_dict(data["cfg"]), data["cmds"]
+
+    def _store_disk(self, key: str, signature, cfg: ScopeConfig, cmds: list):
+        if not self.disk_dir:
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            target = self._disk_path(key)
+            tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": _STORE_VERSION, "path": key, "signature": signature,
+                           "cfg": cfg.to_dict(), "cmds": cmds}, f)
+            os.replace(tmp, target)
+        except OSError as e:
+            print(f"[WARN] Could not write compile cache entry for {key}: {e}")
+
+    def compile(self, path: str):
+        """Return (cfg, cmds) for the test file at path; treat both as read-only."""
+        key = os.path.abspath(path)
+        signature = self._signature(key)
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None and entry[0] == signature:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+        stored = self._load_disk(key, signature)
+        if stored is not None:
+            cfg, cmds = stored
+        else:
+            cfg = load_config(key)
+            with span("build", path=key):
+                cmds = build_scpi_sequence(cfg)
+            self._store_disk(key, signature, cfg, cmds)
+        with self._lock:
+            self.misses += 1
+            self._lru[key] = (signature, cfg, cmds)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+        return cfg, cmds
+
+    def invalidate(self, path: str | None = None):
+        with self._lock:
+            if path is None:
+                self._lru.clear()
+                return
+            key = os.path.abspath(path)
+            self._lru.pop(key, None)
+        if self.disk_dir:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_compile_cache() -> CompileCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = CompileCache(disk_dir=os.environ.get("XML_TEST2_COMPILE_CACHE") or None)
+        return _default_cache
+
+def set_compile_cache(cache: CompileCache):
+    global _default_cache
+    with _default_lock:
+        _default_cache = cache
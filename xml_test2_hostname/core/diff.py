@@ -0,0 +1,101 @@
+import threading
+
+# Differential apply: remember the settings last applied to each resource
+# and send only the commands that change them. Settings are keyed by SCPI
+# header (":CHAN1:SCAL", ":TRIG:EDGE:LEV", …); commands without an argument
+# (SINGLE, RUN, *CLS, …) are actions and are always sent.
+
+def setting_key(cmd: str) -> str | None:
+    head, sep, _ = cmd.strip().partition(" ")
+    if not sep:
+        return None
+    return head.lstrip(":").upper()
+
+def _normalize(value: str) -> str:
+    value = value.strip().strip("'\"").upper()
+    return {"ON": "1", "OFF": "0"}.get(value, value)
+
+def same_value(expected: str, reply: str) -> bool:
+    """Compare a sent argument with an instrument's query reply.
+
+    Replies use their own number format ("+5.0E-02" for "0.05"), 1/0 for
+    ON/OFF and short mnemonics, so compare numerically where possible and
+    by prefix otherwise.
+    """
+    a, b = _normalize(expected), _normalize(reply)
+    try:
+        fa, fb = float(a), float(b)
+        return abs(fa - fb) <= 1e-9 * max(1.0, abs(fa), abs(fb))
+    except ValueError:
+        pass
+    return a == b or (bool(a) and bool(b) and (a.startswith(b) or b.startswith(a)))
+
+class AppliedStateCache:
+    def __init__(self):
+        self._states = {}   # resource -> (session generation, {key: cmd})
+        self._lock = threading.Lock()
+
+    def plan(self, resource: str, cmds, generation: int) -> list:
+        """Commands from cmds that need sending given what was last applied."""
+        with self._lock:
+            entry = self._states.get(resource)
+        if entry is None or entry[0] != generation:
+            # Unknown state or the session was reopened: full apply
+            return list(cmds)
+        state = entry[1]
+        out = []
+        for cmd in cmds:
+            key = setting_key(cmd)
+            if key is None or state.get(key) != cmd:
+                out.append(cmd)
+        return out
+
+    def commit(self, resource: str, cmds, generation: int):
+        with self._lock:
+            entry = self._states.get(resource)
+            state = dict(entry[1]) if entry is not None and entry[0] == generation else {}
+            for cmd in cmds:
+                key = setting_key(cmd)
+                if key is not None:
+                    state[key] = cmd
+            self._states[resource] = (generation, state)
+
+    def forget(self, resource: str | None = None):
+        with self._lock:
+            if resource is None:
+                self._states.clear()
+            else:
+                self._states.pop(resource, None)
+
+    def verify(self, resource: str, inst) -> list:
+        """Query each remembered setting; drop the ones the scope disagrees with.
+
+        Returns the keys that were dropped, so the next plan() re-sends them.
+        """
+        with self._lock:
+            entry = self._states.get(resource)
+        if entry is None:
+            return []
+        generation, state = entry
+        stale = []
+        for key, cmd in state.items():
+            expected = cmd.strip().partition(" ")[2]
+            try:
+                reply = inst.query(f":{key}?")
+            except Exception:
+                stale.append(key)
+                continue
+            if not same_value(expected, reply):
+                stale.append(key)
+        if stale:
+            with self._lock:
+                current = self._states.get(resource)
+                if current is not None and current[0] == generation:
+                    for key in stale:
+                        current[1].pop(key, None)
+        return stale
+
+_default_cache = AppliedStateCache()
+
+def get_state_cache() -> AppliedStateCache:
+    return _default_cache
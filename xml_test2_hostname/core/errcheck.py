@@ -0,0 +1,134 @@
+from core.diff import setting_key
+from utils.trace import span
+
+# Error checking for a whole SCPI sequence. The fast path sends the
+# sequence as usual (prefixed with *CLS) and drains SYST:ERR? once, so a
+# clean config costs a single extra round trip. Only when errors come back
+# are they attributed: the sequence is replayed as growing prefixes and
+# binary-searched for the command after which the error count rises.
+# Replaying prefixes, rather than arbitrary halves, keeps every command in
+# the context of the ones before it (e.g. :TRIG:EDGE:LEV after
+# :TRIG:MODE EDGE), so a command is only blamed for errors it causes.
+# Actions (:SING, :RUN, *OPC? …) are left out of the replays so the scope
+# is not re-armed on every step, and the number of replays is capped.
+MAX_ERRORS = 32
+MAX_REPLAYS = 24
+
+class ScpiError(RuntimeError):
+    def __init__(self, resource: str, failures: list):
+        self.resource = resource
+        self.failures = failures   # [(command or None, [error strings])]
+        parts = [f"{cmd or '(unattributed)'} -> {'; '.join(errs)}" for cmd, errs in failures]
+        super().__init__(f"{len(failures)} command(s) rejected by {resource}: " + " | ".join(parts))
+
+def is_no_error(reply: str) -> bool:
+    code = reply.split(",", 1)[0].strip()
+    try:
+        return int(code) == 0
+    except ValueError:
+        return False
+
+def read_errors(inst, limit: int = MAX_ERRORS) -> list:
+    """Drain the instrument's error queue; [] if it was empty."""
+    errors = []
+    with span("SYST:ERR?", "scpi"):
+        for _ in range(limit):
+            reply = inst.query("SYST:ERR?").strip()
+            if is_no_error(reply):
+                break
+            errors.append(reply)
+    return errors
+
+def _run(inst, cmds, send) -> list:
+    send(inst, ["*CLS"] + list(cmds))
+    return read_errors(inst)
+
+class _Replayer:
+    """Replays prefixes of the settings in cmds, at most max_replays times."""
+    def __init__(self, inst, cmds, send, max_replays: int):
+        self.inst = inst
+        self.send = send
+        self.cmds = cmds
+        # Position in cmds of each setting; actions are never replayed
+        self.settings = [i for i, cmd in enumerate(cmds) if setting_key(cmd) is not None]
+        self.left = max_replays
+        self.replayed = False
+        self.applied = len(self.settings)   # settings in force after the last send
+
+    def prefix(self, k: int) -> list:
+        self.left -= 1
+        self.replayed = True
+        self.applied = k
+        return _run(self.inst, [self.cmds[i] for i in self.settings[:k]], self.send)
+
+    def restore(self):
+        # Re-send the settings the last replay stopped short of, then the
+        # actions (trigger arming etc.), in their original order
+        if not self.replayed:
+            return
+        rest = set(self.settings[self.applied:])
+        _run(self.inst, [cmd for i, cmd in enumerate(self.cmds)
+                         if i in rest or setting_key(cmd) is None], self.send)
+
+def _first_prefix_over(replay: _Replayer, lo: int, hi: int, count: int):
+    """Smallest k in (lo, hi] whose settings prefix yields more than count errors.
+
+    Returns (k, errors), or None if no prefix does or the replay budget runs out.
+    """
+    errors = None
+    while hi - lo > 1:
+        if replay.left <= 0:
+            return None
+        mid = (lo + hi) // 2
+        errs = replay.prefix(mid)
+        if len(errs) > count:
+            hi, errors = mid, errs
+        else:
+            lo = mid
+    if errors is None:
+        if replay.left <= 0:
+            return None
+        errors = replay.prefix(hi)
+        if len(errors) <= count:
+            return None
+    return hi, errors
+
+def bisect_errors(inst, cmds, send, total_errors: list, max_replays: int = MAX_REPLAYS) -> list:
+    """Attribute total_errors (from running all of cmds) to individual commands.
+
+    Only settings are replayed. Errors that no settings prefix reproduces
+    (e.g. from an action command) or that are left when max_replays runs
+    out are reported unattributed, as (None, errors).
+    """
+    cmds = list(cmds)
+    replay = _Replayer(inst, cmds, send, max_replays)
+    failures = []
+    count = 0
+    lo = 0
+    with span("bisect_errors"):
+        while count < len(total_errors) and lo < len(replay.settings):
+            found = _first_prefix_over(replay, lo, len(replay.settings), count)
+            if found is None:
+                break
+            k, errs = found
+            new = errs[count:]
+            failures.append((cmds[replay.settings[k - 1]], new))
+            count = len(errs)
+            lo = k
+        if count < len(total_errors):
+            failures.append((None, total_errors[count:]))
+        replay.restore()
+    return failures
+
+def send_checked(inst, cmds, send) -> list:
+    """Send cmds via send(inst, cmds) and return [(command, errors)] for rejected ones.
+
+    A clean sequence is sent once. If the scope reports errors, prefixes
+    of the sequence's settings are re-sent (at most MAX_REPLAYS times) to
+    find the commands responsible, and the remaining settings and the
+    action commands are then sent again so the scope ends up configured.
+    """
+    errors = _run(inst, cmds, send)
+    if not errors:
+        return []
+    return bisect_errors(inst, cmds, send, errors)
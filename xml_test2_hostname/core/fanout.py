@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from core.diff import get_state_cache
+from core.xml_ro_scpi import apply_commands, apply_xml_to_scope
+from utils.trace import capture, summarize
+
+# Apply one configuration to many scopes at once. Each target runs on its
+# own worker with its own deadline, so one slow scope no longer holds up
+# the rest of the bench. A worker that misses its deadline cannot be
+# interrupted, so its resource stays busy (new applies to it fail) until
+# the worker returns, and its remembered diff state is dropped.
+MAX_WORKERS = 8
+TARGET_TIMEOUT_S = 30.0
+
+_running = set()      # resources with an apply in progress
+_abandoned = set()    # of those, the ones fan_out() stopped waiting for
+_running_lock = threading.Lock()
+
+def busy_resources() -> set:
+    """Resources still held by an apply, e.g. one that timed out and hasn't returned."""
+    with _running_lock:
+        return set(_running)
+
+def _timed_apply(apply_fn, resource: str, started: dict):
+    with _running_lock:
+        if resource in _running:
+            raise RuntimeError(f"{resource} is still busy with an earlier apply that timed out")
+        _running.add(resource)
+    try:
+        started[resource] = time.monotonic()
+        with capture() as spans:
+            apply_fn(resource)
+        return time.monotonic() - started[resource], summarize(spans)
+    finally:
+        with _running_lock:
+            if resource in _abandoned:
+                # It finished past its deadline; what it committed can't be trusted
+                _abandoned.discard(resource)
+                get_state_cache().forget(resource)
+            _running.discard(resource)
+
+def _abandon(resource: str):
+    with _running_lock:
+        if resource in _running:
+            _abandoned.add(resource)
+    # The next apply must send the full config
+    get_state_cache().forget(resource)
+
+def apply_to_many(xml_path: str, resources, max_workers: int = MAX_WORKERS,
+                  timeout_s: float | None = TARGET_TIMEOUT_S, **apply_kwargs) -> list:
+    """Apply xml_path to every resource concurrently; see fan_out() for the report.
+
+    Extra keyword arguments are passed to apply_xml_to_scope.
+    """
+    return fan_out(lambda res: apply_xml_to_scope(xml_path, res, **apply_kwargs),
+                   resources, max_workers, timeout_s)
+
+def apply_commands_to_many(cmds, resources, max_workers: int = MAX_WORKERS,
+                           timeout_s: float | None = TARGET_TIMEOUT_S, **apply_kwargs) -> list:
+    """Like apply_to_many() for an already built SCPI sequence."""
+    return fan_out(lambda res: apply_commands(cmds, res, **apply_kwargs),
+                   resources, max_workers, timeout_s)
+
+def fan_out(apply_fn, resources, max_workers: int = MAX_WORKERS,
+            timeout_s: float | None = TARGET_TIMEOUT_S) -> list:
+    """Call apply_fn(resource) for every resource concurrently.
+
+    Returns one dict per resource, in the order given:
+      - resource: VISA resource string
+      - ok: True if the apply completed
+      - error: error string, or "" on success
+      - elapsed_s: seconds spent on this target
+      - trace: on success, summary of the apply's spans (total_s,
+        slowest command and its time; see utils.trace.summarize)
+
+    A target still running `timeout_s` after it started is reported as
+    timed out; until its worker returns, later calls report that resource
+    as busy instead of opening a second session to it.
+    """
+    resources = list(dict.fromkeys(resources))
+    if not resources:
+        return []
+    report = {}
+    started = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(resources))),
+                              thread_name_prefix="fanout")
+    try:
+        pending = {
+            pool.submit(_timed_apply, apply_fn, res, started): res
+            for res in resources
+        }
+        while pending:
+            done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for fut in done:
+                res = pending.pop(fut)
+                try:
+                    elapsed, summary = fut.result()
+                    report[res] = {"resource": res, "ok": True, "error": "", "elapsed_s": elapsed,
+                                   "trace": summary}
+                except Exception as e:
+                    elapsed = now - started.get(res, now)
+                    report[res] = {"resource": res, "ok": False, "error": str(e), "elapsed_s": elapsed}
+            if timeout_s is None:
+                continue
+            for fut, res in list(pending.items()):
+                t0 = started.get(res)
+                if t0 is not None and now - t0 > timeout_s:
+                    # The worker cannot be interrupted; stop waiting for it
+                    del pending[fut]
+                    _abandon(res)
+                    report[res] = {"resource": res, "ok": False,
+                                   "error": f"timed out after {timeout_s:g}s",
+                                   "elapsed_s": now - t0}
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return [report[res] for res in resources]
@@ -0,0 +1,156 @@
+import glob
+import os
+import re
+import time
+
+from config.keysight_scope import build_scpi_sequence
+from core.compile_cache import get_compile_cache
+from core.fanout import (MAX_WORKERS, TARGET_TIMEOUT_S, apply_commands_to_many, apply_to_many,
+                         fan_out)
+from core.sweep import point_label, sweep_sequences
+from core.xml_ro_scpi import apply_commands
+from utils.test_index import test_sort_key
+from utils.xml_loader import is_suite, iter_suite
+
+# Headless execution of a test plan: an ordered list of testNNN.xml files
+# (or suite files holding many configurations) applied to one or more
+# instruments, with per-test timings.
+
+_TEST_RE = re.compile(r"test(.*)\.xml", re.IGNORECASE)
+
+def test_number(path: str) -> str:
+    m = _TEST_RE.fullmatch(os.path.basename(path))
+    return m.group(1) if m else os.path.basename(path)
+
+def _test_key(path: str):
+    return test_sort_key(test_number(path))
+
+def collect_tests(patterns) -> list:
+    """Expand directories (their test*.xml) and globs into an ordered file list."""
+    paths = []
+    for pat in patterns:
+        if os.path.isdir(pat):
+            with os.scandir(pat) as it:
+                matches = [e.path for e in it if _TEST_RE.fullmatch(e.name)]
+        elif os.path.isfile(pat):
+            matches = [pat]
+        else:
+            matches = glob.glob(pat)
+        paths.extend(sorted(matches, key=_test_key))
+    return list(dict.fromkeys(paths))
+
+def find_suites(paths) -> set:
+    """The paths in paths that are suite files (each file's root tag is read once)."""
+    return {path for path in paths if is_suite(path)}
+
+def iter_plan(paths, sweep_axes=None, combine: str = "product", suites=None):
+    """Yield (test_id, path, cmds) for every configuration in paths.
+
+    Single-config files yield cmds=None and are applied by path (through
+    the compile cache); suite files are streamed one configuration at a
+    time so the first one can be sent before the file is fully read.
+    With sweep_axes (see core.sweep.sweep), every configuration is
+    expanded into its sweep points, with test ids like "001[trigger.level=0.5]".
+    suites, from find_suites(paths), saves classifying the paths again.
+    """
+    if suites is None:
+        paths = list(paths)
+        suites = find_suites(paths)
+    for path in paths:
+        if path in suites:
+            configs = iter_suite(path)
+        elif sweep_axes:
+            configs = [(test_number(path), get_compile_cache().compile(path)[0])]
+        else:
+            yield test_number(path), path, None
+            continue
+        for name, cfg in configs:
+            if not sweep_axes:
+                yield name, path, build_scpi_sequence(cfg)
+                continue
+            for point, _, cmds in sweep_sequences(cfg, sweep_axes, combine):
+                yield f"{name}[{point_label(point)}]", path, cmds
+
+def _dry_run(path: str, cmds) -> dict:
+    t0 = time.monotonic()
+    if cmds is None:
+        _, cmds = get_compile_cache().compile(path)
+    return {"resource": "(dry run)", "ok": True, "error": "", "commands": len(cmds),
+            "elapsed_s": time.monotonic() - t0}
+
+def _apply_and_store(test_id, path, cmds, resources, store, max_workers=MAX_WORKERS,
+                     timeout_s=TARGET_TIMEOUT_S, **apply_kwargs) -> list:
+    # numpy is only needed once captures are requested
+    from core.acquire import capture, channels_in
+
+    if cmds is None:
+        _, cmds = get_compile_cache().compile(path)
+    channels = channels_in(cmds)
+
+    def run(res):
+        apply_commands(cmds, res, **apply_kwargs)
+        store.add(test_id, res, capture(res, channels))
+
+    return fan_out(run, resources, max_workers, timeout_s)
+
+def run_plan(paths, resources, dry_run: bool = False, stop_on_error: bool = False,
+             progress=None, capture_store=None, sweep_axes=None, combine: str = "product",
+             **apply_kwargs) -> dict:
+    """Apply each test in order to every resource; return a results dict.
+
+    `progress`, if given, is called as progress(index, total, test_result)
+    after each test; total is None when suite files make it unknown up
+    front. With a utils.capture_store.CaptureStore, each target's displayed
+    channels are captured after the apply and stored under the test number.
+    sweep_axes/combine expand each configuration into a sweep (see
+    iter_plan). Extra keyword arguments go to apply_xml_to_scope.
+    """
+    paths = list(paths)
+    suites = find_suites(paths)
+    total = None if sweep_axes or suites else len(paths)
+    tests = []
+    t_start = time.monotonic()
+    started_at = time.time()
+    for i, (test_id, path, cmds) in enumerate(iter_plan(paths, sweep_axes, combine, suites), 1):
+        t0 = time.monotonic()
+        if dry_run:
+            targets = [_dry_run(path, cmds)]
+        else:
+            try:
+                if capture_store is not None:
+                    targets = _apply_and_store(test_id, path, cmds, resources, capture_store,
+                                               **apply_kwargs)
+                elif cmds is None:
+                    targets = apply_to_many(path, resources, **apply_kwargs)
+                else:
+                    targets = apply_commands_to_many(cmds, resources, **apply_kwargs)
+            except Exception as e:
+                targets = [{"resource": res, "ok": False, "error": str(e), "elapsed_s": 0.0}
+                           for res in resources]
+        result = {
+            "test": test_id,
+            "path": path,
+            "ok": all(t["ok"] for t in targets),
+            "elapsed_s": time.monotonic() - t0,
+            "targets": targets,
+        }
+        tests.append(result)
+        if progress is not None:
+            progress(i, total, result)
+        if stop_on_error and not result["ok"]:
+            break
+    wall = time.monotonic() - t_start
+    passed = sum(1 for t in tests if t["ok"])
+    return {
+        "started_at": started_at,
+        "resources": list(resources),
+        "dry_run": dry_run,
+        "summary": {
+            "tests": len(tests),
+            "passed": passed,
+            "failed": len(tests) - passed,
+            "wall_s": wall,
+            "configs_per_s": (len(tests) / wall) if wall > 0 else 0.0,
+        },
+        "tests": tests,
+    }
@@ -0,0 +1,290 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from core.plan import iter_plan
+from core.xml_ro_scpi import apply_commands, apply_xml_to_scope
+
+# Bench scheduler: a queue of test configurations shared by every
+# compatible scope. Each instrument gets one worker thread that takes the
+# next job it can run as soon as it is free, so a plan finishes as fast as
+# the bench allows instead of waiting on one scope at a time. A job that
+# fails is retried on an instrument it has not failed on yet; a scope that
+# keeps failing is taken out of rotation. Finished jobs are appended to a
+# checkpoint file so an interrupted run resumes where it stopped.
+MAX_ATTEMPTS = 2
+# Consecutive failures after which an instrument stops taking jobs
+MAX_INSTRUMENT_FAILURES = 3
+# Jobs read ahead from the plan; suites are not loaded all at once
+QUEUE_WINDOW_PER_WORKER = 4
+
+def idn_model(idn: str) -> str:
+    """Model field of an *IDN? reply ("KEYSIGHT TECHNOLOGIES,DSOX3034T,…")."""
+    parts = [p.strip() for p in idn.split(",")]
+    return parts[1].upper() if len(parts) >= 2 else ""
+
+def instruments_from_rows(rows, models=None) -> list:
+    """(resource, model) for discovery rows that answered *IDN?, optionally filtered."""
+    wanted = {m.upper() for m in models} if models else None
+    out = []
+    for row in rows:
+        idn = row.get("idn", "")
+        if not idn or idn.startswith("("):
+            continue
+        model = idn_model(idn)
+        if wanted is None or model in wanted:
+            out.append((row["resource"], model))
+    return out
+
+class Job:
+    __slots__ = ("test", "path", "cmds", "models", "attempts", "failed_on", "errors")
+
+    def __init__(self, test: str, path: str, cmds=None, models=None):
+        self.test = test
+        self.path = path
+        self.cmds = cmds
+        self.models = {m.upper() for m in models} if models else None
+        self.attempts = 0
+        self.failed_on = set()
+        self.errors = []
+
+    @property
+    def key(self) -> str:
+        # Suites hold many tests in one file, so the path alone is not unique
+        return f"{os.path.abspath(self.path)}#{self.test}"
+
+    def runs_on(self, resource: str, model: str) -> bool:
+        return resource not in self.failed_on and (self.models is None or model in self.models)
+
+class Checkpoint:
+    """Append-only JSON-lines record of finished jobs."""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        """key -> last recorded result (later lines win)."""
+        done = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue   # torn last line of an interrupted run
+                    done[rec["key"]] = rec
+        except FileNotFoundError:
+            pass
+        return done
+
+    def record(self, result: dict):
+        line = json.dumps(result) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+
+class Scheduler:
+    def __init__(self, instruments, max_attempts: int = MAX_ATTEMPTS,
+                 max_instrument_failures: int = MAX_INSTRUMENT_FAILURES,
+                 checkpoint: str | None = None, **apply_kwargs):
+        """instruments: (resource, model) pairs, e.g. from instruments_from_rows().
+
+        Extra keyword arguments go to apply_xml_to_scope.
+        """
+        self.instruments = list(dict(instruments).items())
+        self.max_attempts = max_attempts
+        self.max_instrument_failures = max_instrument_failures
+        self.checkpoint = Checkpoint(checkpoint) if checkpoint else None
+        self.apply_kwargs = apply_kwargs
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._source = None
+        self._in_flight = 0
+        self._live = {}           # resource -> model, instruments still taking jobs
+        self._results = []
+        self._stats = {}
+        self._progress = None
+        self._cancel = None
+        self._source_error = None
+
+    # Queue handling; all called with self._cond held
+
+    def _fill(self):
+        window = QUEUE_WINDOW_PER_WORKER * max(1, len(self.instruments))
+        while self._source is not None and len(self._pending) < window:
+            try:
+                job = next(self._source, None)
+            except Exception as e:
+                # A bad plan file; stop feeding and report it from run()
+                self._source_error = e
+                job = None
+            if job is None:
+                self._source = None
+                break
+            if self._runnable(job):
+                self._pending.append(job)
+            else:
+                # Would otherwise wait forever for a scope that can take it
+                self._finish(job, None, False, 0.0, "no compatible instrument")
+
+    def _runnable(self, job: Job) -> bool:
+        return any(job.runs_on(res, model) for res, model in self._live.items())
+
+    def _drop_orphans(self):
+        # After an instrument leaves, some queued jobs may have nowhere to go
+        for job in [j for j in self._pending if not self._runnable(j)]:
+            self._pending.remove(job)
+            self._finish(job, None, False, 0.0,
+                         job.errors[-1] if job.errors else "no compatible instrument")
+
+    def _take(self, resource: str, model: str):
+        """Next job for this instrument, or None once the plan is exhausted."""
+        while True:
+            if self._cancel is not None and self._cancel.is_set():
+                return None
+            if resource not in self._live:
+                return None
+            self._fill()
+            for job in self._pending:
+                if job.runs_on(resource, model):
+                    self._pending.remove(job)
+                    self._in_flight += 1
+                    return job
+            if self._in_flight == 0 and self._source is None:
+                # Nothing can come back for this instrument
+                return None
+            self._cond.wait(0.5)
+
+    def _finish(self, job: Job, resource, ok: bool, elapsed: float, error: str = ""):
+        result = {
+            "key": job.key, "test": job.test, "path": job.path, "ok": ok,
+            "resource": resource, "attempts": job.attempts, "elapsed_s": elapsed,
+            "error": error, "errors": list(job.errors), "finished_at": time.time(),
+        }
+        self._results.append(result)
+        if self.checkpoint is not None:
+            self.checkpoint.record(result)
+        if self._progress is not None:
+            self._progress(len(self._results), result)
+
+    # Workers
+
+    def _apply(self, job: Job, resource: str):
+        if job.cmds is None:
+            apply_xml_to_scope(job.path, resource, **self.apply_kwargs)
+        else:
+            apply_commands(job.cmds, resource, **self.apply_kwargs)
+
+    def _worker(self, resource: str, model: str):
+        stats = self._stats[resource]
+        consecutive = 0
+        while True:
+            with self._cond:
+                job = self._take(resource, model)
+            if job is None:
+                break
+            job.attempts += 1
+            t0 = time.monotonic()
+            try:
+                self._apply(job, resource)
+                error = None
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            elapsed = time.monotonic() - t0
+            with self._cond:
+                self._in_flight -= 1
+                stats["busy_s"] += elapsed
+                if error is None:
+                    consecutive = 0
+                    stats["passed"] += 1
+                    self._finish(job, resource, True, elapsed)
+                else:
+                    consecutive += 1
+                    stats["failed"] += 1
+                    job.failed_on.add(resource)
+                    job.errors.append(f"{resource}: {error}")
+                    if consecutive >= self.max_instrument_failures:
+                        self._live.pop(resource, None)
+                        stats["retired"] = True
+                        self._drop_orphans()
+                    if job.attempts < self.max_attempts and self._runnable(job):
+                        # Retry ahead of new work on another scope
+                        self._pending.appendleft(job)
+                    else:
+                        self._finish(job, resource, False, elapsed, error)
+                self._cond.notify_all()
+        with self._cond:
+            self._live.pop(resource, None)
+            self._drop_orphans()
+            self._cond.notify_all()
+
+    def run(self, jobs, progress=None, cancel: threading.Event | None = None) -> dict:
+        """Run jobs (Job objects) to completion; return a results dict.
+
+        Jobs already recorded as passed in the checkpoint are skipped.
+        `progress`, if given, is called as progress(finished_count, result)
+        from worker threads. Setting `cancel` stops dispatching new jobs.
+        """
+        done = self.checkpoint.load() if self.checkpoint is not None else {}
+        resumed = 0
+
+        def remaining():
+            nonlocal resumed
+            for job in jobs:
+                if done.get(job.key, {}).get("ok"):
+                    resumed += 1
+                    continue
+                yield job
+
+        self._source = iter(remaining())
+        self._source_error = None
+        self._pending.clear()
+        self._results = []
+        self._in_flight = 0
+        self._progress = progress
+        self._cancel = cancel
+        self._live = dict(self.instruments)
+        self._stats = {res: {"resource": res, "model": model, "passed": 0, "failed": 0,
+                             "busy_s": 0.0, "retired": False}
+                       for res, model in self.instruments}
+        started_at = time.time()
+        t_start = time.monotonic()
+        threads = [threading.Thread(target=self._worker, args=(res, model),
+                                    name=f"sched-{res}", daemon=True)
+                   for res, model in self.instruments]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        with self._cond:
+            if cancel is None or not cancel.is_set():
+                # No instrument left (or none at all): report what was never run
+                self._fill()
+        if self._source_error is not None:
+            raise self._source_error
+        wall = time.monotonic() - t_start
+        passed = sum(1 for r in self._results if r["ok"])
+        busy = sum(s["busy_s"] for s in self._stats.values())
+        return {
+            "started_at": started_at,
+            "instruments": list(self._stats.values()),
+            "summary": {
+                "tests": len(self._results),
+                "passed": passed,
+                "failed": len(self._results) - passed,
+                "resumed": resumed,
+                "cancelled": bool(cancel is not None and cancel.is_set()),
+                "wall_s": wall,
+                "configs_per_s": (passed / wall) if wall > 0 else 0.0,
+                "utilization": (busy / (wall * len(threads))) if wall > 0 and threads else 0.0,
+            },
+            "tests": list(self._results),
+        }
+
+def jobs_from_paths(paths, models=None, sweep_axes=None, combine: str = "product"):
+    """Lazily turn test files and suites into Jobs (see core.plan.iter_plan)."""
+    for test_id, path, cmds in iter_plan(paths, sweep_axes, combine):
+        yield Job(test_id, path, cmds, models)
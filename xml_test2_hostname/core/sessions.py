@@ -0,0 +1,242 @@
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.trace import span
+
+# One ResourceManager per process and a pool of open sessions per VISA
+# resource. Opening a LAN session (and the *IDN? handshake that goes with
+# it) costs far more than the few writes of a typical apply, so sessions
+# are kept open between calls and reused until they sit idle too long; a
+# timer closes them once they have, since many scopes accept only one or a
+# few connections and an idle one would lock other users out.
+IDLE_TIMEOUT_S = 60.0
+# A session idle for longer than this is health-checked before reuse
+HEALTH_CHECK_AFTER_S = 5.0
+MAX_IDLE_PER_RESOURCE = 2
+DEFAULT_TIMEOUT_MS = 2000
+
+def _load_pyvisa():
+    # pyvisa and its backend take a noticeable time to import, so they are
+    # only loaded when the first session or resource list is needed
+    import pyvisa
+    return pyvisa
+
+def _connection_lost(exc: BaseException) -> bool:
+    # Only a dead link is worth a reconnect; a timeout or a rejected command
+    # would just fail (or be sent) again on a fresh session
+    if isinstance(exc, TimeoutError):
+        return False
+    if isinstance(exc, OSError):
+        return True
+    from pyvisa.constants import StatusCode
+    from pyvisa.errors import VisaIOError
+    return isinstance(exc, VisaIOError) and exc.error_code in (
+        StatusCode.error_connection_lost, StatusCode.error_invalid_object, StatusCode.error_io)
+
+class SessionManager:
+    def __init__(self,
+                 idle_timeout_s: float = IDLE_TIMEOUT_S,
+                 health_check_after_s: float = HEALTH_CHECK_AFTER_S,
+                 max_idle_per_resource: int = MAX_IDLE_PER_RESOURCE):
+        self.idle_timeout_s = idle_timeout_s
+        self.health_check_after_s = health_check_after_s
+        self.max_idle_per_resource = max_idle_per_resource
+        self._rm = None
+        self._rm_pid = None
+        self._idle = {}          # resource -> [(inst, last_used), ...]
+        self._generation = {}    # resource -> number of sessions opened
+        self._timer = None       # pending eviction of idle sessions
+        self._lock = threading.Lock()
+
+    def resource_manager(self):
+        with self._lock:
+            # A forked child must not share the parent's VISA handles
+            if self._rm is None or self._rm_pid != os.getpid():
+                self._rm = _load_pyvisa().ResourceManager()
+                self._rm_pid = os.getpid()
+                self._idle.clear()
+            return self._rm
+
+    def set_resource_manager(self, rm):
+        """Use `rm` (e.g. a simulated backend) instead of the default one."""
+        self.close_all()
+        with self._lock:
+            self._rm = rm
+            self._rm_pid = os.getpid()
+
+    def list_resources(self, query: str = "?*::INSTR"):
+        return self.resource_manager().list_resources(query)
+
+    def generation(self, resource: str) -> int:
+        """Count of sessions opened to `resource`; changes on every reconnect."""
+        with self._lock:
+            return self._generation.get(resource, 0)
+
+    def _open(self, resource: str, timeout_ms: int):
+        rm = self.resource_manager()
+        with span("open", resource=resource):
+            inst = rm.open_resource(resource, timeout=timeout_ms, open_timeout=timeout_ms)
+        try:
+            inst.read_termination = '\n'
+            inst.write_termination = '\n'
+        except Exception:
+            pass
+        with self._lock:
+            self._generation[resource] = self._generation.get(resource, 0) + 1
+        return inst
+
+    @staticmethod
+    def _close(inst):
+        with span("close"):
+            try:
+                inst.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _healthy(inst) -> bool:
+        with span("health_check"):
+            try:
+                inst.query("*IDN?")
+                return True
+            except Exception:
+                return False
+
+    def _evict_expired(self, now: float) -> list:
+        # Caller holds self._lock; returns sessions to close outside the lock
+        expired = []
+        for res in list(self._idle):
+            keep = []
+            for inst, last_used in self._idle[res]:
+                if now - last_used > self.idle_timeout_s:
+                    expired.append(inst)
+                else:
+                    keep.append((inst, last_used))
+            if keep:
+                self._idle[res] = keep
+            else:
+                del self._idle[res]
+        return expired
+
+    def _schedule_eviction(self):
+        # Caller holds self._lock; wake when the oldest idle session expires
+        if self._timer is not None or not self._idle:
+            return
+        oldest = min(last_used for lst in self._idle.values() for _, last_used in lst)
+        delay = max(0.0, oldest + self.idle_timeout_s - time.monotonic()) + 0.05
+        self._timer = threading.Timer(delay, self._on_eviction_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_eviction_timer(self):
+        with self._lock:
+            self._timer = None
+        self.evict_idle()
+
+    def _acquire(self, resource: str, timeout_ms: int):
+        """Return (inst, reused)."""
+        now = time.monotonic()
+        with self._lock:
+            expired = self._evict_expired(now)
+            entries = self._idle.get(resource)
+            pooled = entries.pop() if entries else None
+        for inst in expired:
+            self._close(inst)
+        if pooled is not None:
+            inst, last_used = pooled
+            if now - last_used <= self.health_check_after_s or self._healthy(inst):
+                inst.timeout = timeout_ms
+                return inst, True
+            self._close(inst)
+        return self._open(resource, timeout_ms), False
+
+    def _release(self, resource: str, inst):
+        with self._lock:
+            expired = self._evict_expired(time.monotonic())
+            entries = self._idle.setdefault(resource, [])
+            if len(entries) < self.max_idle_per_resource:
+                entries.append((inst, time.monotonic()))
+                inst = None
+            self._schedule_eviction()
+        for old in expired:
+            self._close(old)
+        if inst is not None:
+            self._close(inst)
+
+    @contextmanager
+    def session(self, resource: str, timeout_ms: int = DEFAULT_TIMEOUT_MS):
+        """Borrow an open session; it returns to the pool unless an error escapes."""
+        inst, _ = self._acquire(resource, timeout_ms)
+        try:
+            yield inst
+        except BaseException:
+            self._close(inst)
+            raise
+        self._release(resource, inst)
+
+    def run(self, resource: str, fn, timeout_ms: int = DEFAULT_TIMEOUT_MS):
+        """Call fn(inst) on a pooled session, reconnecting once if a reused one lost its link."""
+        inst, reused = self._acquire(resource, timeout_ms)
+        try:
+            result = fn(inst)
+        except Exception as e:
+            self._close(inst)
+            if not reused or not _connection_lost(e):
+                raise
+            # The pooled session went stale (scope rebooted, link dropped)
+            inst = self._open(resource, timeout_ms)
+            try:
+                result = fn(inst)
+            except BaseException:
+                self._close(inst)
+                raise
+        except BaseException:
+            self._close(inst)
+            raise
+        self._release(resource, inst)
+        return result
+
+    def evict_idle(self):
+        with self._lock:
+            expired = self._evict_expired(time.monotonic())
+            self._schedule_eviction()
+        for inst in expired:
+            self._close(inst)
+
+    def close_all(self):
+        with self._lock:
+            entries = [inst for lst in self._idle.values() for inst, _ in lst]
+            self._idle.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        for inst in entries:
+            self._close(inst)
+
+_default_manager = None
+_default_lock = threading.Lock()
+
+def get_session_manager() -> SessionManager:
+    global _default_manager
+    with _default_lock:
+        if _default_manager is None:
+            _default_manager = SessionManager()
+            atexit.register(_default_manager.close_all)
+        return _default_manager
+
+def warm_up():
+    """Load the VISA stack and create the ResourceManager ahead of first use."""
+    try:
+        get_session_manager().resource_manager()
+    except Exception as e:
+        print(f"[WARN] VISA warm-up failed: {e}")
+
+def set_session_manager(manager: SessionManager | None) -> SessionManager | None:
+    """Install `manager` as the process default; returns the previous one."""
+    global _default_manager
+    with _default_lock:
+        previous, _default_manager = _default_manager, manager
+        return previous
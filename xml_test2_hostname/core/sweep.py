@@ -0,0 +1,141 @@
+import itertools
+import math
+
+from config.keysight_scope import build_scpi_sequence
+from config.model import CHANNEL_NUMBERS, ChannelConfig, ScopeConfig, TriggerConfig
+
+# Parameter sweeps in memory: derive configs from a base config (as returned
+# by load_config) by setting one or more axes, instead of cloning a test
+# file per point. Points are generated lazily and each derived ScopeConfig
+# shares every record it does not change with the base, so a sweep of any
+# length streams straight to an instrument without touching the disk.
+#
+# Axes are addressed by path into the config dict:
+#   time_scale, display_label, trigger_command
+#   trigger.level, trigger.mode, trigger.source, trigger.slope
+#   channels.<number>.scale, channels.<number>.display, … (channel number, not index)
+COMBINE_MODES = ("product", "zip")
+
+def frange(start: float, stop: float, step: float) -> list:
+    """start, start+step, … up to and including stop (within rounding)."""
+    if step == 0:
+        raise ValueError("Sweep step must not be 0")
+    count = math.floor((stop - start) / step + 1e-9) + 1
+    return [round(start + i * step, 12) for i in range(max(count, 0))]
+
+def parse_axis(spec: str):
+    """'path=v1,v2,…' or 'path=start:stop:step' -> (path, values)."""
+    path, sep, values = spec.partition("=")
+    path, values = path.strip(), values.strip()
+    if not sep or not path or not values:
+        raise ValueError(f"Bad sweep axis {spec!r} (want path=v1,v2 or path=start:stop:step)")
+    if values.count(":") == 2 and "," not in values:
+        start, stop, step = (float(v) for v in values.split(":"))
+        return path, frange(start, stop, step)
+    return path, [v.strip() for v in values.split(",") if v.strip()]
+
+def _format(current, value):
+    # Keep the base field's type: bools stay bools, text fields get strings
+    if isinstance(current, bool):
+        if isinstance(value, str):
+            return value.strip().upper() in ("ON", "1", "TRUE", "YES")
+        return bool(value)
+    if isinstance(value, float):
+        return f"{value:.12g}"
+    if isinstance(current, int):
+        return int(value)
+    return str(value).strip()
+
+def _set(cfg: ScopeConfig, path: str, value) -> ScopeConfig:
+    """Copy of cfg with path set; unchanged records are shared, not copied."""
+    parts = path.split(".")
+    if parts[0] == "channels" and len(parts) == 3:
+        number, field = int(parts[1]), parts[2]
+        ch = cfg.channel(number)
+        if ch is None:
+            raise ValueError(f"Sweep axis {path!r}: base config has no channel {number}")
+        if field not in ch:
+            raise ValueError(f"Unknown sweep axis {path!r}")
+        return cfg.with_channel(number, **{field: _format(ch[field], value)})
+    if parts[0] == "trigger" and len(parts) == 2 and parts[1] in cfg.trigger:
+        trig = cfg.trigger
+        return cfg.replace(trigger=trig.replace(**{parts[1]: _format(trig[parts[1]], value)}))
+    if len(parts) == 1 and path in cfg and path not in ("channels", "trigger"):
+        return cfg.replace(**{path: _format(cfg[path], value)})
+    raise ValueError(f"Unknown sweep axis {path!r}")
+
+def _check_path(path: str):
+    # Field names are checked here so a typo fails before any instrument is touched
+    parts = path.split(".")
+    if len(parts) == 1:
+        valid = path in ScopeConfig._fields and path not in ("channels", "trigger")
+    elif parts[0] == "trigger" and len(parts) == 2:
+        valid = parts[1] in TriggerConfig._fields
+    elif parts[0] == "channels" and len(parts) == 3:
+        if not parts[1].isdigit() or int(parts[1]) not in CHANNEL_NUMBERS:
+            raise ValueError(f"Sweep axis {path!r}: channel must be one of {CHANNEL_NUMBERS}")
+        valid = parts[2] in ChannelConfig._fields and parts[2] != "number"
+    else:
+        valid = False
+    if not valid:
+        raise ValueError(f"Unknown sweep axis {path!r}")
+
+def check_axes(axes, combine: str = "product", base: ScopeConfig | None = None) -> list:
+    """Validate axes up front; return them as a list of (path, values) pairs.
+
+    With base, channel axes must also name channels base has.
+    """
+    axes = [(p, list(v)) for p, v in (axes.items() if isinstance(axes, dict) else axes)]
+    if combine not in COMBINE_MODES:
+        raise ValueError(f"combine must be one of {COMBINE_MODES}, not {combine!r}")
+    for path, values in axes:
+        _check_path(path)
+        if not values:
+            raise ValueError(f"Sweep axis {path!r} has no values")
+        parts = path.split(".")
+        if base is not None and parts[0] == "channels" and base.channel(int(parts[1])) is None:
+            raise ValueError(f"Sweep axis {path!r}: base config has no channel {parts[1]}")
+    if combine == "zip":
+        lengths = {len(v) for _, v in axes}
+        if len(lengths) > 1:
+            raise ValueError(f"Zipped sweep axes differ in length: {sorted(lengths)}")
+    return axes
+
+def _points(axes, combine: str):
+    paths = [p for p, _ in axes]
+    value_lists = [v for _, v in axes]
+    if combine == "zip":
+        combos = zip(*value_lists)
+    else:
+        combos = itertools.product(*value_lists)
+    for combo in combos:
+        yield dict(zip(paths, combo))
+
+def sweep(base: ScopeConfig, axes, combine: str = "product"):
+    """Return an iterator of (point, cfg) for every point of the sweep.
+
+    base (a ScopeConfig, or a config dict) is not modified. axes maps
+    config paths to value lists (or is a list of (path, values) pairs, to
+    fix the order); combine is "product" for every combination or "zip" to
+    step all axes together. Axes are checked against base before anything
+    is returned, so a bad one fails before the first point is applied.
+    """
+    base = ScopeConfig.from_dict(base)
+    axes = check_axes(axes, combine, base)
+    return _sweep(base, axes, combine)
+
+def _sweep(base: ScopeConfig, axes, combine: str):
+    for point in _points(axes, combine):
+        cfg = base
+        for path, value in point.items():
+            cfg = _set(cfg, path, value)
+        yield point, cfg
+
+def sweep_sequences(base: ScopeConfig, axes, combine: str = "product"):
+    """Like sweep(), with the SCPI sequence of every derived config: (point, cfg, cmds)."""
+    points = sweep(base, axes, combine)
+    return ((point, cfg, build_scpi_sequence(cfg)) for point, cfg in points)
+
+def point_label(point: dict) -> str:
+    return ",".join(f"{path}={value:.12g}" if isinstance(value, float) else f"{path}={value}"
+                    for path, value in point.items())
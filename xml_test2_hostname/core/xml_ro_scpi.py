@@ -1,23 +1,85 @@
-from utils.xml_loader import load_config
-from config.keysight_scope import build_scpi_sequence
-import pyvisa
+from functools import partial
 
-def apply_xml_to_scope(xml_path: str, resource: str | None = None):
-    cfg = load_config(xml_path)
-    cmds = build_scpi_sequence(cfg)
+from core.batching import MAX_MESSAGE_BYTES, send_batched, send_individually
+from core.compile_cache import get_compile_cache
+from core.diff import get_state_cache
+from core.errcheck import ScpiError, send_checked
+from core.sessions import DEFAULT_TIMEOUT_MS, get_session_manager
+from utils.trace import span
 
-    rm = pyvisa.ResourceManager()
+def apply_xml_to_scope(xml_path: str, resource: str | None = None,
+                       batch: bool = False, max_message_bytes: int = MAX_MESSAGE_BYTES,
+                       diff: bool = False, verify_state: bool = False,
+                       check_errors: bool = False, timeout_ms: int = DEFAULT_TIMEOUT_MS):
+    """Send the config in xml_path to `resource` (first VISA resource if None).
+
+    batch: pack commands into ';'-joined messages ending in *OPC?.
+    diff: send only settings that changed since the last apply to this
+        resource; a reconnect since then forces a full apply.
+    verify_state: with diff, first query the remembered settings and
+        re-send any the scope no longer holds (e.g. front-panel changes).
+    check_errors: drain SYST:ERR? after the sequence and, if the scope
+        rejected anything, raise ScpiError naming the offending commands.
+    timeout_ms: VISA I/O timeout for the session.
+    """
+    with span("apply", path=xml_path, resource=resource):
+        # Parsed once per file version; later applies skip XML parsing entirely
+        _, cmds = get_compile_cache().compile(xml_path)
+        return _apply(cmds, resource, batch, max_message_bytes, diff, verify_state,
+                      check_errors, timeout_ms)
+
+def apply_commands(cmds, resource: str | None = None,
+                   batch: bool = False, max_message_bytes: int = MAX_MESSAGE_BYTES,
+                   diff: bool = False, verify_state: bool = False,
+                   check_errors: bool = False, timeout_ms: int = DEFAULT_TIMEOUT_MS):
+    """Send an already built SCPI sequence; options as for apply_xml_to_scope."""
+    with span("apply", resource=resource):
+        return _apply(cmds, resource, batch, max_message_bytes, diff, verify_state,
+                      check_errors, timeout_ms)
+
+def _apply(cmds, resource, batch, max_message_bytes, diff, verify_state, check_errors=False,
+           timeout_ms=DEFAULT_TIMEOUT_MS):
+    manager = get_session_manager()
     if resource is None:
-        resources = rm.list_resources()
+        resources = manager.list_resources()
         if not resources:
             raise RuntimeError("No VISA resources found.")
         resource = resources[0]
 
-    with rm.open_resource(resource, timeout=2000) as inst:
+    states = get_state_cache()
+
+    def send(inst):
+        to_send = cmds
+        generation = manager.generation(resource)
+        if diff:
+            if verify_state:
+                with span("verify_state"):
+                    states.verify(resource, inst)
+            to_send = states.plan(resource, cmds, generation)
+        if batch:
+            # ';'-joined messages ending in one *OPC? sync
+            transmit = partial(send_batched, max_bytes=max_message_bytes)
+        else:
+            transmit = send_individually
         try:
-            _ = inst.query("*IDN?").strip()
+            if check_errors:
+                failures = send_checked(inst, to_send, transmit)
+            else:
+                transmit(inst, to_send)
+                failures = []
         except Exception:
-            pass
-        for cmd in cmds:
-            inst.write(cmd)
+            # Part of the sequence may have landed; the scope state is unknown
+            states.forget(resource)
+            raise
+        if failures:
+            states.forget(resource)
+        else:
+            states.commit(resource, cmds, generation)
+        return failures
+
+    # Pooled session: reused across calls, reopened once if it went stale.
+    # Rejected commands come back as a value so they don't trigger a reconnect.
+    failures = manager.run(resource, send, timeout_ms)
+    if failures:
+        raise ScpiError(resource, failures)
     return True
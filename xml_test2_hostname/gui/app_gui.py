@@ -1,16 +1,24 @@
 import os
 import re
+import queue
 import shutil
+import threading
 import xml.etree.ElementTree as ET
-import xml.dom.minidom as minidom
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from tkinter.scrolledtext import ScrolledText
 
-# Discovery returns hostname/resource/idn and already filters HiSLIP in your patched utils.discovery
-from utils.discovery import discover_instruments
-# Sender that applies a saved XML to the selected VISA resource
-from core.xml_ro_scpi import apply_xml_to_scope
+# Discovery (utils.discovery) and the parallel sender (core.fanout) pull in
+# the VISA stack, so they are imported on first scan/apply, or by the
+# background warm-up started once the window is up.
+# Parsed-config cache used by apply; entries are dropped when a test file is rewritten
+from core.compile_cache import get_compile_cache
+# Single-pass serializer, same output as the old ET.tostring -> minidom round trip
+from utils.xml_writer import prettify_xml
+# Type-ahead filtering for the instrument and test lists, matched per keystroke
+from utils.search_index import SearchIndex
+# Per-directory listing of testNNN.xml, rescanned only when the directory changes
+from utils.test_index import TEST_FILE_RE, get_test_index, test_sort_key
 
 APP_TITLE = "xml_test2 GUI — Config Builder + Hostname Picker"
 DEFAULT_SAVE_ROOT = os.path.join("test_configs", "keysight_scope")
@@ -20,24 +28,18 @@ TRIGGER_MODES = ["EDGE", "RUNT", "BUS", "GLITCH", "PULSE", "VIDEO", "PATTERN"]
 TRIGGER_SLOPES = ["POS", "NEG"]
 TRIGGER_SOURCES = ["CHAN1", "CHAN2", "CHAN3", "CHAN4", "EXT", "LINE"]
 
-def prettify_xml(elem: ET.Element) -> str:
-    rough = ET.tostring(elem, "utf-8")
-    parsed = minidom.parseString(rough)
-    return parsed.toprettyxml(indent="    ")
+def _warm_up_visa():
+    try:
+        import core.fanout  # noqa: F401
+        import utils.discovery  # noqa: F401
+        from core.sessions import warm_up
+    except ImportError as e:
+        print(f"[WARN] VISA support unavailable: {e}")
+        return
+    warm_up()
 
 def list_existing_tests(path: str):
-    tests = []
-    if os.path.isdir(path):
-        for name in os.listdir(path):
-            m = re.fullmatch(r"test(\w+)\.xml", name, flags=re.IGNORECASE)
-            if m:
-                tests.append(m.group(1))
-    def keyfn(s):
-        try:
-            return (0, int(s))
-        except ValueError:
-            return (1, s.lower())
-    return sorted(tests, key=keyfn)
+    return get_test_index(path).tests()
 
 class ChannelFrame(ttk.LabelFrame):
     def __init__(self, master, number: int):
@@ -104,7 +106,376 @@ class ChannelFrame(ttk.LabelFrame):
         self.var_unit.set(unit_val if unit_val in CHANNEL_UNITS else "")
         self._toggle_enable()
 
+class VirtualList(ttk.Frame):
+    """Treeview that only ever holds the rows in view.
+
+    rows is any sequence (e.g. SearchIndex.filter() matches); a fixed pool of
+    Treeview items is refilled from it on scroll, so tens of thousands of
+    rows cost no more to show than a screenful. values(row) gives a row's
+    column values, key(row) identifies it for the selection.
+    """
+    def __init__(self, master, columns, values, key, height=12, selectmode="extended",
+                 show="headings"):
+        super().__init__(master)
+        self._values = values
+        self._key = key
+        self._selectmode = selectmode
+        # Selection is tracked here, by key, since items are reused for other rows
+        self.tree = ttk.Treeview(self, columns=columns, show=show, height=height,
+                                 selectmode="none")
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self._rows = []
+        self._row_keys = None     # keys of rows, built when first needed
+        self._top = 0
+        self._visible = height
+        self._items = []          # pooled Treeview items, top to bottom
+        self._shown = []          # values currently in each pooled item
+        self._selected = {}       # key -> row
+        self._anchor = None       # row index Shift-click extends from
+        self.cursor = 0           # row index keyboard navigation moves
+        self._height_px = 0
+        self._row_px = None       # (header, row height), measured once rows are drawn
+        self._fit_pending = False
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<Button-1>", self._on_click)
+        self.tree.bind("<Double-Button-1>", lambda e: self._activate())
+        self.tree.bind("<MouseWheel>", self.wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        for keysym, step in (("Up", -1), ("Down", 1), ("Prior", "-page"), ("Next", "page"),
+                             ("Home", "home"), ("End", "end")):
+            self.tree.bind(f"<{keysym}>",
+                           lambda e, s=step: self.move_cursor(s, bool(e.state & 0x0001)))
+        self.tree.bind("<Return>", lambda e: self._activate())
+
+    @property
+    def rows(self):
+        return self._rows
+
+    def set_rows(self, rows, keep_position=False):
+        """Show rows; keep_position keeps the scroll offset (rows were added, not filtered)."""
+        self._rows = rows
+        self._row_keys = None
+        if not keep_position:
+            self._top = 0
+            self.cursor = 0
+            self._anchor = None
+        self._render()
+
+    # Selection
+
+    def selection(self) -> list:
+        """Selected rows that are still listed, in list order."""
+        if not self._selected:
+            return []
+        if len(self._selected) == 1:
+            row = next(iter(self._selected.values()))
+            return [row] if self._contains(row) else []
+        return [row for row in self._rows if self._key(row) in self._selected]
+
+    def _contains(self, row) -> bool:
+        if self._row_keys is None:
+            self._row_keys = {self._key(r) for r in self._rows}
+        return self._key(row) in self._row_keys
+
+    def cursor_row(self):
+        return self._rows[self.cursor] if 0 <= self.cursor < len(self._rows) else None
+
+    def select_index(self, index: int, extend=False, toggle=False):
+        if not 0 <= index < len(self._rows):
+            return
+        row = self._rows[index]
+        multi = self._selectmode == "extended"
+        if extend and multi and self._anchor is not None:
+            lo, hi = sorted((self._anchor, index))
+            self._selected = {self._key(r): r for r in self._rows[lo:hi + 1]}
+        elif toggle and multi:
+            k = self._key(row)
+            if k in self._selected:
+                del self._selected[k]
+            else:
+                self._selected[k] = row
+            self._anchor = index
+        else:
+            self._selected = {self._key(row): row}
+            self._anchor = index
+        self.cursor = index
+        self.see(index)
+        self.event_generate("<<ListSelect>>")
+
+    def clear_selection(self):
+        self._selected = {}
+        self._anchor = None
+        self._render()
+
+    # Scrolling
+
+    def see(self, index: int):
+        if index < self._top:
+            self._top = index
+        elif index >= self._top + self._visible:
+            self._top = index - self._visible + 1
+        self._render()
+
+    def scroll(self, lines: int):
+        self._top += lines
+        self._render()
+        return "break"
+
+    def yview(self, *args):
+        # Scrollbar protocol: ("moveto", fraction) or ("scroll", n, "units"|"pages")
+        if not args:
+            return self._fraction()
+        if args[0] == "moveto":
+            self._top = int(float(args[1]) * len(self._rows))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= max(1, self._visible - 1)
+            self._top += step
+        self._render()
+
+    def move_cursor(self, step, extend=False):
+        n = len(self._rows)
+        if not n:
+            return "break"
+        page = max(1, self._visible - 1)
+        target = {"home": 0, "end": n - 1, "page": self.cursor + page,
+                  "-page": self.cursor - page}.get(step, None)
+        if target is None:
+            target = self.cursor + step
+        self.select_index(max(0, min(n - 1, target)), extend=extend)
+        return "break"
+
+    def _fraction(self):
+        n = len(self._rows)
+        if n <= self._visible:
+            return 0.0, 1.0
+        return self._top / n, min(1.0, (self._top + self._visible) / n)
+
+    def wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        lines = -event.delta // 120 if abs(event.delta) >= 120 else -event.delta
+        return self.scroll(3 * lines)
+
+    def _on_configure(self, event):
+        self._height_px = event.height
+        self._fit()
+
+    def _fit(self):
+        # Show as many rows as the widget has room for
+        self._fit_pending = False
+        if self._row_px is None:
+            bbox = self.tree.bbox(self._items[0]) if self._items else ""
+            if not bbox:
+                return
+            self._row_px = (bbox[1], max(1, bbox[3]))
+        header, row_height = self._row_px
+        visible = max(1, (self._height_px - header) // row_height)
+        if self._height_px and visible != self._visible:
+            self._visible = visible
+            self._render()
+
+    def _on_click(self, event):
+        if self.tree.identify_region(event.x, event.y) in ("heading", "separator"):
+            return None   # let the Treeview resize columns
+        item = self.tree.identify_row(event.y)
+        if item in self._items:
+            self.tree.focus_set()
+            self.select_index(self._top + self._items.index(item),
+                              extend=bool(event.state & 0x0001), toggle=bool(event.state & 0x0004))
+        return "break"
+
+    def _activate(self):
+        if self.cursor_row() is not None:
+            self.event_generate("<<ListActivate>>")
+        return "break"
+
+    def _render(self):
+        n = len(self._rows)
+        self._top = max(0, min(self._top, n - self._visible))
+        window = self._rows[self._top:self._top + self._visible]
+        while len(self._items) < len(window):
+            self._items.append(self.tree.insert("", "end"))
+            self._shown.append(None)
+        while len(self._items) > len(window):
+            self.tree.delete(self._items.pop())
+            self._shown.pop()
+        selected = []
+        focus = ""
+        for i, (item, row) in enumerate(zip(self._items, window)):
+            values = self._values(row)
+            if values != self._shown[i]:
+                self.tree.item(item, values=values)
+                self._shown[i] = values
+            if self._key(row) in self._selected:
+                selected.append(item)
+            if self._top + i == self.cursor:
+                focus = item
+        self.tree.selection_set(selected)
+        self.tree.focus(focus)
+        self.vsb.set(*self._fraction())
+        if self._row_px is None and self._items and not self._fit_pending:
+            self._fit_pending = True
+            self.after_idle(self._fit)
+
+# Keys that move around or modify other keys; they do not change the filter
+_NON_EDITING_KEYS = {"Up", "Down", "Prior", "Next", "Return", "Escape", "Tab", "Left", "Right",
+                     "Home", "End", "Shift_L", "Shift_R", "Control_L", "Control_R",
+                     "Alt_L", "Alt_R", "Caps_Lock"}
+
+class FilterCombobox(ttk.Frame):
+    """Entry with a drop-down list of values, filtered as you type.
+
+    Replaces a readonly Combobox whose listbox would hold every value: the
+    drop-down is a VirtualList over a SearchIndex, so it opens and narrows
+    at the same speed for ten values or fifty thousand.
+    """
+    def __init__(self, master, textvariable, width=14, height=12, sort_key=None):
+        super().__init__(master)
+        self.var = textvariable
+        self.height = height
+        self._index = SearchIndex(sort_key=sort_key)
+        self._values = []
+        self._value_set = set()
+        self.entry = ttk.Entry(self, textvariable=textvariable, width=width)
+        self.entry.pack(side="left", fill="x", expand=True)
+        ttk.Button(self, text="▾", width=2, command=self.toggle).pack(side="left")
+        self._popup = None
+        self._list = None
+
+        self.entry.bind("<KeyRelease>", self._on_key)
+        self.entry.bind("<Down>", lambda e: self._navigate(1))
+        self.entry.bind("<Up>", lambda e: self._navigate(-1))
+        self.entry.bind("<Prior>", lambda e: self._navigate("-page"))
+        self.entry.bind("<Next>", lambda e: self._navigate("page"))
+        self.entry.bind("<Return>", lambda e: self._choose_cursor())
+        self.entry.bind("<Escape>", lambda e: self.close())
+        # Windows sends wheel events to the focused widget, which stays the entry
+        self.entry.bind("<MouseWheel>", lambda e: self._list.wheel(e) if self._list else None)
+        self.entry.bind("<FocusOut>", lambda e: self.after(150, self._close_unless_focused))
+
+    def set_values(self, values):
+        values = list(values)
+        if values == self._values:
+            return
+        self._values = values
+        self._value_set = set(values)
+        self._index.clear()
+        self._index.extend(values)
+        if self._list is not None:
+            self._list.set_rows(self._index.filter(self.var.get()))
+
+    def values(self) -> list:
+        return list(self._values)
+
+    def selected(self) -> str | None:
+        """The typed value if it is one of the values, else None (e.g. half typed)."""
+        value = self.var.get().strip()
+        return value if value in self._value_set else None
+
+    # Drop-down
+
+    def toggle(self):
+        if self._popup is not None:
+            self.close()
+        else:
+            # Opened from the button: everything, positioned at the current value
+            self.open("")
+            self.entry.focus_set()
+
+    def open(self, query: str):
+        matches = self._index.filter(query)
+        if self._popup is None:
+            self._popup = tk.Toplevel(self)
+            self._popup.overrideredirect(True)
+            self._popup.transient(self.winfo_toplevel())
+            self._list = VirtualList(self._popup, columns=("value",), values=lambda v: (v,),
+                                     key=lambda v: v, height=self.height, selectmode="browse",
+                                     show="")
+            self._list.pack(fill="both", expand=True)
+            # A click picks a value; arrow keys only move the cursor
+            self._list.tree.bind("<ButtonRelease-1>", self._on_release, add="+")
+            self._list.bind("<<ListActivate>>", lambda e: self._choose_cursor())
+        self._list.tree.configure(height=max(1, min(self.height, len(matches))))
+        self._list.set_rows(matches)
+        try:
+            self._list.cursor = matches.index(self.var.get().strip())
+            self._list.see(self._list.cursor)
+        except ValueError:
+            pass
+        self.update_idletasks()
+        x = self.winfo_rootx()
+        y = self.winfo_rooty() + self.winfo_height()
+        self._popup.geometry(f"{max(self.winfo_width(), 120)}x{self._list.winfo_reqheight()}+{x}+{y}")
+        self._popup.lift()
+
+    def close(self):
+        if self._popup is not None:
+            self._popup.destroy()
+        self._popup = None
+        self._list = None
+        return "break"
+
+    def _close_unless_focused(self):
+        if self._popup is None or not self.winfo_exists():
+            return
+        try:
+            focus = self.focus_get()
+        except KeyError:
+            focus = None   # focus is in a widget Tkinter does not know (another popdown)
+        # Clicking a row focuses the list; only focus leaving both closes it
+        if focus is None or not (focus is self.entry or str(focus).startswith(str(self._popup))):
+            self.close()
+
+    def _on_key(self, event):
+        if event.keysym in _NON_EDITING_KEYS:
+            return
+        if not self._values:
+            return
+        self.open(self.var.get())
+
+    def _on_release(self, event):
+        if self._list is not None and self._list.tree.identify_row(event.y):
+            self._choose_cursor()
+
+    def _navigate(self, step):
+        if not self._values:
+            return "break"
+        if self._popup is None:
+            self.open(self.var.get())
+        return self._list.move_cursor(step)
+
+    def _choose_cursor(self):
+        row = self._list.cursor_row() if self._list is not None else None
+        if row is not None:
+            self.var.set(row)
+            self.entry.icursor("end")
+        self.entry.focus_set()
+        return self.close()
+
+def _picker_values(row) -> tuple:
+    return (row.get("hostname") or "(unknown)", row.get("idn", ""), row.get("resource", ""))
+
+def _picker_text(row) -> str:
+    # One line per field, so a query word cannot match across two of them
+    return "\n".join(_picker_values(row))
+
+def _picker_sort_key(row) -> tuple:
+    # The (hostname, resource) order discover_instruments() uses
+    name, _, res = _picker_values(row)
+    return (name, res)
+
 class InstrumentPicker(tk.Toplevel):
+    # Rows from one queue drain above this are indexed in one sort, not one by one
+    BULK_ROWS = 64
+
     def __init__(self, master, on_choose):
         super().__init__(master)
         self.title("Select Instrument")
@@ -115,18 +486,34 @@ class InstrumentPicker(tk.Toplevel):
         frm = ttk.Frame(self)
         frm.pack(fill="both", expand=True, padx=10, pady=10)
 
-        self.tree = ttk.Treeview(frm, columns=("name","idn","res"), show="headings", height=12)
+        search = ttk.Frame(frm)
+        search.pack(fill="x", pady=(0,6))
+        ttk.Label(search, text="Filter").pack(side="left", padx=(0,4))
+        self.var_filter = tk.StringVar()
+        self.ent_filter = ttk.Entry(search, textvariable=self.var_filter)
+        self.ent_filter.pack(side="left", fill="x", expand=True)
+        self.var_filter.trace_add("write", lambda *_: self._apply_filter())
+        self.ent_filter.bind("<Down>", lambda e: self._focus_list())
+        self.ent_filter.bind("<Return>", lambda e: self._select())
+
+        # Only the rows in view are Treeview items; filtering and scrolling
+        # refill them from the search index
+        self._index = SearchIndex(text=_picker_text, sort_key=_picker_sort_key)
+        self.list = VirtualList(frm, columns=("name","idn","res"), values=_picker_values,
+                                key=lambda row: row.get("resource", ""), height=12)
+        self.tree = self.list.tree
         self.tree.heading("name", text="Hostname")
         self.tree.heading("idn", text="*IDN?")
         self.tree.heading("res", text="Resource")
         self.tree.column("name", width=260, anchor="w")
         self.tree.column("idn", width=320, anchor="w")
         self.tree.column("res", width=340, anchor="w")
-        self.tree.pack(fill="both", expand=True)
+        self.list.pack(fill="both", expand=True)
+        self.list.bind("<<ListActivate>>", lambda e: self._select())
 
         btns = ttk.Frame(frm)
         btns.pack(fill="x", pady=(8,0))
-        self.btn_refresh = ttk.Button(btns, text="Refresh", command=self._refresh)
+        self.btn_refresh = ttk.Button(btns, text="Refresh", command=lambda: self._refresh(force=True))
         self.btn_refresh.pack(side="left", padx=(0,6))
         self.btn_select = ttk.Button(btns, text="Select", command=self._select)
         self.btn_select.pack(side="right", padx=(6,0))
@@ -136,30 +523,114 @@ class InstrumentPicker(tk.Toplevel):
         self.status = tk.StringVar(value="Scanning…")
         ttk.Label(frm, textvariable=self.status, anchor="w").pack(fill="x", pady=(6,0))
 
+        # Background scan state: rows travel from the worker thread to the
+        # Tk thread through _queue and are drained by an after() poll.
+        self._queue = queue.Queue()
+        self._cancel_event = None
+        self._scan_thread = None
+
         self.grab_set()
+        self.ent_filter.focus_set()
         self._refresh()
 
-    def _refresh(self):
+    def _refresh(self, force=False):
+        # The first scan shows cached rows at once; Refresh re-probes everything
+        if self._scan_thread is not None and self._scan_thread.is_alive():
+            return  # a scan is already running
         self.status.set("Scanning…")
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        items = discover_instruments()
-        for it in items:
-            name = it.get("hostname") or "(unknown)"
-            self.tree.insert("", "end", values=(name, it.get("idn",""), it.get("resource","")))
-        self.status.set(f"Found {len(items)} resource(s). (HiSLIP hidden)")
+        self._index.clear()
+        self.list.set_rows(self._index.filter(self.var_filter.get()))
+        self.btn_refresh.configure(state="disabled")
+        self._cancel_event = threading.Event()
+        self._queue = queue.Queue()
+        self._scan_thread = threading.Thread(target=self._scan_worker,
+                                             args=(self._queue, self._cancel_event, force),
+                                             daemon=True)
+        self._scan_thread.start()
+        self.after(50, self._drain_queue)
+
+    @staticmethod
+    def _scan_worker(q, cancel, force):
+        try:
+            from utils.discovery import iter_instruments
+            for row, probed, total in iter_instruments(cancel=cancel, refresh=force):
+                q.put(("row", row, probed, total))
+            q.put(("done", None, None, None))
+        except Exception as e:
+            q.put(("error", e, None, None))
+
+    def _drain_queue(self):
+        if not self.winfo_exists():
+            return
+        finished = done = False
+        rows = []
+        try:
+            while True:
+                kind, payload, probed, total = self._queue.get_nowait()
+                if kind == "row":
+                    rows.append(payload)
+                    self.status.set(f"Scanning… {probed}/{total}")
+                elif kind == "done":
+                    finished = done = True
+                else:
+                    self.status.set(f"Scan failed: {payload}")
+                    finished = True
+        except queue.Empty:
+            pass
+        if rows:
+            self._insert_rows(rows)
+        if done:
+            self.status.set(f"Found {len(self._index)} resource(s). (HiSLIP hidden)"
+                            + self._filter_note())
+        if finished:
+            self.btn_refresh.configure(state="normal")
+        else:
+            self.after(50, self._drain_queue)
+
+    def _insert_rows(self, rows):
+        if len(rows) > self.BULK_ROWS:
+            self._index.extend(rows)
+        else:
+            for row in rows:
+                self._index.add(row)
+        # Rows arrived while scrolled or filtered: keep the view where it is
+        self.list.set_rows(self._index.filter(self.var_filter.get()), keep_position=True)
+
+    def _apply_filter(self):
+        self.list.set_rows(self._index.filter(self.var_filter.get()))
+        if self._scan_thread is None or not self._scan_thread.is_alive():
+            self.status.set(f"Found {len(self._index)} resource(s). (HiSLIP hidden)"
+                            + self._filter_note())
+
+    def _filter_note(self) -> str:
+        if not self.var_filter.get().strip():
+            return ""
+        return f"  Showing {len(self.list.rows)} matching “{self.var_filter.get().strip()}”."
+
+    def _focus_list(self):
+        self.tree.focus_set()
+        self.list.move_cursor(0)
+        return "break"
 
     def _select(self):
-        sel = self.tree.selection()
-        if not sel:
+        rows = self.list.selection()
+        if not rows and self.list.cursor_row() is not None and self.var_filter.get().strip():
+            # Enter in the filter box takes the highlighted match
+            rows = [self.list.cursor_row()]
+        if not rows:
             return
-        vals = self.tree.item(sel[0])["values"]
-        resource = vals[2]
-        idn = vals[1]
-        self.on_choose(resource, idn)
+        # (resource, idn) for every selected row; Ctrl/Shift-click picks several
+        chosen = [(row.get("resource", ""), row.get("idn", "")) for row in rows]
+        self._stop_scan()
+        self.on_choose(chosen)
         self.destroy()
 
+    def _stop_scan(self):
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+
     def _cancel(self):
+        self._stop_scan()
         self.destroy()
 
 class App(tk.Tk):
@@ -181,6 +652,8 @@ class App(tk.Tk):
         self.var_save_path = tk.StringVar(value=DEFAULT_SAVE_ROOT)
         self.var_existing_tests = tk.StringVar()
         self.var_selected_res = tk.StringVar(value="(none)")
+        self.selected_resources = []
+        self._apply_thread = None
 
         # Toolbar
         toolbar = ttk.Frame(self)
@@ -196,9 +669,11 @@ class App(tk.Tk):
         self.ent_testnum.grid(row=0, column=4, sticky="w", padx=(0,12))
 
         ttk.Label(toolbar, text="Existing Tests").grid(row=0, column=5, sticky="e", padx=(0,4))
-        self.cmb_existing = ttk.Combobox(toolbar, textvariable=self.var_existing_tests, width=14, state="readonly")
+        # Type to filter; the drop-down only draws the rows in view
+        self.cmb_existing = FilterCombobox(toolbar, textvariable=self.var_existing_tests, width=14,
+                                           sort_key=test_sort_key)
         self.cmb_existing.grid(row=0, column=6, sticky="w", padx=(0,4))
-        ttk.Button(toolbar, text="Refresh", command=self.refresh_existing_tests).grid(row=0, column=7, padx=(0,4))
+        ttk.Button(toolbar, text="Refresh", command=lambda: self.refresh_existing_tests(force=True)).grid(row=0, column=7, padx=(0,4))
         ttk.Button(toolbar, text="Load Selected", command=self.load_selected).grid(row=0, column=8, padx=(0,12))
         ttk.Button(toolbar, text="Clone Selected…", command=self.clone_selected).grid(row=0, column=9, padx=(0,4))
         ttk.Button(toolbar, text="Delete Selected", command=self.delete_selected).grid(row=0, column=10, padx=(0,12))
@@ -281,7 +756,15 @@ class App(tk.Tk):
         statusbar = ttk.Label(self, textvariable=self.status, anchor="w", relief="sunken")
         statusbar.pack(fill="x", padx=0, pady=(0,0), ipady=2)
 
-        self.var_save_path.trace_add("write", lambda *_: self.refresh_existing_tests(silent=True))
+        # Debounced: typing a path should not rescan a directory per keystroke
+        self._path_refresh_job = None
+        self.var_save_path.trace_add("write", lambda *_: self._schedule_path_refresh())
+        # Serialized XML is cached against the form state it was built from,
+        # so Preview/Save only rebuild it after an actual edit
+        self._xml_state = None
+        self._xml_cache = ""
+        self._preview_shown = ""
+
         self.reset_all()
         self.after(200, self._post_init_safe)
 
@@ -299,6 +782,9 @@ class App(tk.Tk):
             self.refresh_existing_tests(silent=True)
         except Exception as e:
             self.notify("warn", f"Could not refresh existing tests during startup: {e}")
+        # The window is up; load the VISA stack off the Tk thread so the
+        # first scan or apply does not pay for it
+        threading.Thread(target=_warm_up_visa, name="visa-warm-up", daemon=True).start()
 
     def current_save_dir(self) -> str:
         path = self.var_save_path.get().strip()
@@ -317,7 +803,7 @@ class App(tk.Tk):
                 self.notify("error", f"Could not create directory:\n{path}\n\n{e}")
 
     def selected_test_path(self) -> str | None:
-        tnum = self.var_existing_tests.get().strip()
+        tnum = self.cmb_existing.selected()
         if not tnum:
             return None
         return os.path.join(self.current_save_dir(), f"test{tnum}.xml")
@@ -331,10 +817,20 @@ class App(tk.Tk):
             self.var_save_path.set(chosen)
             self.ensure_save_dir()
 
-    def refresh_existing_tests(self, silent=False):
+    def _schedule_path_refresh(self, delay_ms=300):
+        if self._path_refresh_job is not None:
+            self.after_cancel(self._path_refresh_job)
+        def run():
+            self._path_refresh_job = None
+            self.refresh_existing_tests(silent=True)
+        self._path_refresh_job = self.after(delay_ms, run)
+
+    def refresh_existing_tests(self, silent=False, force=False):
         path = self.current_save_dir()
+        if force:
+            get_test_index(path).refresh(force=True)
         tests = list_existing_tests(path)
-        self.cmb_existing["values"] = tests
+        self.cmb_existing.set_values(tests)
         cur = self.var_testnum.get().strip()
         if cur in tests:
             self.var_existing_tests.set(cur)
@@ -380,6 +876,8 @@ class App(tk.Tk):
                 return
             try:
                 shutil.copy2(src, dst)
+                get_compile_cache().invalidate(dst)
+                get_test_index(self.current_save_dir()).add(new_num)
                 self.notify("info", f"Cloned to: {dst}")
                 self.refresh_existing_tests(silent=True)
                 self.var_existing_tests.set(new_num)
@@ -407,6 +905,10 @@ class App(tk.Tk):
         def confirm_delete():
             try:
                 os.remove(path)
+                get_compile_cache().invalidate(path)
+                m = TEST_FILE_RE.fullmatch(base)
+                if m:
+                    get_test_index(os.path.dirname(path)).remove(m.group(1))
                 self.notify("info", f"Deleted: {base}")
                 self.refresh_existing_tests(silent=True)
                 self.var_existing_tests.set("")
@@ -465,10 +967,29 @@ class App(tk.Tk):
 
         self.var_trig_cmd.set(config.findtext("trigger_command", default="SINGLE").upper())
 
+    def _form_vars(self):
+        chans = [v for c in self.channels
+                 for v in (c.var_display, c.var_label, c.var_probe, c.var_scale, c.var_unit)]
+        return chans + [self.var_display_labels, self.var_time_scale, self.var_trig_mode,
+                        self.var_trig_source, self.var_trig_level, self.var_trig_slope,
+                        self.var_trig_cmd]
+
+    def _form_state(self) -> tuple:
+        return tuple(v.get() for v in self._form_vars())
+
+    def render_xml(self) -> str:
+        state = self._form_state()
+        if state != self._xml_state:
+            self._xml_cache = prettify_xml(self.build_xml())
+            self._xml_state = state
+        return self._xml_cache
+
     def preview_xml(self):
-        xml_str = prettify_xml(self.build_xml())
-        self.txt_preview.delete("1.0", "end")
-        self.txt_preview.insert("1.0", xml_str)
+        xml_str = self.render_xml()
+        if xml_str != self._preview_shown:
+            self.txt_preview.delete("1.0", "end")
+            self.txt_preview.insert("1.0", xml_str)
+            self._preview_shown = xml_str
         self.notify("info", "Preview updated")
 
     def save_xml(self):
@@ -487,9 +1008,11 @@ class App(tk.Tk):
 
         filename = os.path.join(save_dir, f"test{test_num}.xml")
         try:
-            xml_str = prettify_xml(self.build_xml())
+            xml_str = self.render_xml()
             with open(filename, "w", encoding="utf-8") as f:
                 f.write(xml_str)
+            get_compile_cache().invalidate(filename)
+            get_test_index(save_dir).add(test_num)
             self.notify("info", f"Config saved to: {filename}")
             self.refresh_existing_tests(silent=True)
             self.var_existing_tests.set(test_num)
@@ -518,9 +1041,15 @@ class App(tk.Tk):
             self.notify("error", f"Could not load file:\n{e}")
 
     def select_instrument(self):
-        def on_choose(res, idn):
-            self.var_selected_res.set(res)
-            self.notify("info", f"Selected {res}   {idn}")
+        def on_choose(chosen):
+            self.selected_resources = [res for res, _ in chosen]
+            if len(chosen) == 1:
+                res, idn = chosen[0]
+                self.var_selected_res.set(res)
+                self.notify("info", f"Selected {res}   {idn}")
+            else:
+                self.var_selected_res.set(f"{len(chosen)} instruments")
+                self.notify("info", "Selected " + ", ".join(self.selected_resources))
         InstrumentPicker(self, on_choose)
 
     def apply_to_scope(self):
@@ -528,15 +1057,62 @@ class App(tk.Tk):
         if not path or not os.path.isfile(path):
             self.notify("warn", "Select or save a test in 'Existing Tests' first.")
             return
-        res = self.var_selected_res.get().strip()
-        if not res or res == "(none)":
+        targets = list(self.selected_resources)
+        if not targets:
             self.notify("warn", "Choose an instrument first (Select Instrument…).")
             return
+        if self._apply_thread is not None and self._apply_thread.is_alive():
+            self.notify("warn", "An apply is already in progress.")
+            return
+        self.notify("info", f"Sending to {len(targets)} instrument(s)…")
+        results = queue.Queue()
+        def worker():
+            from core.fanout import apply_to_many
+            results.put(apply_to_many(path, targets))
+        self._apply_thread = threading.Thread(target=worker, daemon=True)
+        self._apply_thread.start()
+        self.after(50, lambda: self._poll_apply(results))
+
+    def _poll_apply(self, results):
         try:
-            apply_xml_to_scope(path, res)
-            self.notify("info", "✅ Sent successfully")
-        except Exception as e:
-            self.notify("error", f"❌ Error sending: {e}")
+            report = results.get_nowait()
+        except queue.Empty:
+            if self._apply_thread is not None and self._apply_thread.is_alive():
+                self.after(50, lambda: self._poll_apply(results))
+            else:
+                self.notify("error", "❌ Error sending: apply worker stopped unexpectedly")
+            return
+        failed = [r for r in report if not r["ok"]]
+        for r in report:
+            state = "ok" if r["ok"] else f"error: {r['error']}"
+            print(f"[APPLY] {r['resource']}  {r['elapsed_s']:.2f}s  {state}")
+        if len(report) == 1:
+            if failed:
+                self.notify("error", f"❌ Error sending: {failed[0]['error']}")
+            else:
+                self.notify("info", "✅ Sent successfully" + self._trace_summary(report))
+        elif failed:
+            names = ", ".join(r["resource"] for r in failed)
+            self.notify("error", f"❌ Sent to {len(report) - len(failed)}/{len(report)}; failed: {names}")
+        else:
+            slowest = max(r["elapsed_s"] for r in report)
+            self.notify("info", f"✅ Sent to {len(report)} instruments (slowest {slowest:.2f}s)"
+                        + self._trace_summary(report))
+
+    @staticmethod
+    def _trace_summary(report) -> str:
+        # "in 0.42s, slowest :TIM:SCAL 0.20s" from the per-target span summaries
+        traces = [r["trace"] for r in report if r.get("trace")]
+        if not traces:
+            return ""
+        total = max(t["total_s"] for t in traces)
+        text = f" in {total:.2f}s"
+        cmds = [t for t in traces if t["slowest"]]
+        if cmds:
+            worst = max(cmds, key=lambda t: t["slowest_s"])
+            name = worst["slowest"] if len(worst["slowest"]) <= 40 else worst["slowest"][:37] + "…"
+            text += f", slowest {name} {worst['slowest_s'] * 1000:.0f} ms"
+        return text
 
     def reset_all(self):
         # channels
@@ -555,6 +1131,7 @@ class App(tk.Tk):
         self.var_trig_slope.set(TRIGGER_SLOPES[0])
         self.var_trig_cmd.set("SINGLE")
         self.txt_preview.delete("1.0", "end")
+        self._preview_shown = ""
         self.status.set("Reset to defaults")
 
 def main():
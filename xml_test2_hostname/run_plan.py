@@ -0,0 +1,163 @@
+"""Headless test-plan runner.
+
+Examples:
+  python run_plan.py test_configs/keysight_scope -r TCPIP0::10.0.0.5::INSTR
+  python run_plan.py "plans/*.xml" -r RES1 -r RES2 --batch --diff -o results.json
+  python run_plan.py test_configs/keysight_scope --dry-run
+  python run_plan.py regression_suite.xml -r RES1
+  python run_plan.py test_configs/keysight_scope -r RES1 --capture captures/
+  python run_plan.py test_configs/keysight_scope --schedule --model DSOX3034T --checkpoint run.ckpt
+  python run_plan.py test001.xml -r RES1 --sweep trigger.level=0.5:2.0:0.25 --sweep channels.1.scale=0.1,0.2
+"""
+import argparse
+import json
+import sys
+
+from core.compile_cache import CompileCache, set_compile_cache
+from core.plan import collect_tests, run_plan
+from core.sweep import check_axes, parse_axis
+from utils import trace
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Apply a plan of test*.xml configs without the GUI.",
+                                 formatter_class=argparse.RawDescriptionHelpFormatter,
+                                 epilog=__doc__)
+    ap.add_argument("tests", nargs="+", help="directory, glob or file of test*.xml, or suite files")
+    ap.add_argument("-r", "--resource", action="append", default=[],
+                    help="target VISA resource (repeat for several)")
+    ap.add_argument("-o", "--out", default="results.json", help="results file (JSON)")
+    ap.add_argument("--batch", action="store_true", help="send ';'-joined compound messages")
+    ap.add_argument("--diff", action="store_true", help="send only settings that changed")
+    ap.add_argument("--check-errors", action="store_true",
+                    help="read SYST:ERR? after each config and name any rejected command")
+    ap.add_argument("--timeout", type=float, help="per-target timeout (s, default 30)")
+    ap.add_argument("--dry-run", action="store_true", help="parse and build only, no instrument")
+    ap.add_argument("--stop-on-error", action="store_true")
+    ap.add_argument("--trace", metavar="FILE",
+                    help="write timed spans (parse, build, open, each command) as a Chrome trace")
+    ap.add_argument("--compile-cache", metavar="DIR",
+                    help="keep parsed configs on disk here between runs")
+    ap.add_argument("--capture", metavar="DIR",
+                    help="after each apply, capture the displayed channels into this store")
+    ap.add_argument("--sweep", action="append", default=[], metavar="PATH=VALUES",
+                    help="sweep a config field in memory, e.g. time_scale=1e-3,2e-3 or "
+                         "trigger.level=0.5:2.0:0.25 (repeat for more axes)")
+    ap.add_argument("--zip", action="store_true",
+                    help="step all --sweep axes together instead of every combination")
+    ap.add_argument("--schedule", action="store_true",
+                    help="share the tests among the instruments (each test runs once, on the "
+                         "first free compatible scope) instead of applying every test to all")
+    ap.add_argument("--model", action="append", default=[],
+                    help="with --schedule: only use scopes whose *IDN? model matches (repeatable)")
+    ap.add_argument("--checkpoint", metavar="FILE",
+                    help="with --schedule: record finished tests here and skip passed ones on rerun")
+    args = ap.parse_args(argv)
+    if args.schedule:
+        # The scheduler has no per-job deadline, capture or early stop yet
+        unsupported = [flag for flag, given in (("--capture", args.capture),
+                                                ("--timeout", args.timeout is not None),
+                                                ("--stop-on-error", args.stop_on_error)) if given]
+        if unsupported:
+            ap.error(f"{', '.join(unsupported)} cannot be combined with --schedule")
+    if args.timeout is None:
+        args.timeout = 30.0
+
+    if args.compile_cache:
+        set_compile_cache(CompileCache(disk_dir=args.compile_cache))
+
+    args.combine = "zip" if args.zip else "product"
+    try:
+        args.sweep_axes = check_axes([parse_axis(spec) for spec in args.sweep], args.combine)
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+
+    paths = collect_tests(args.tests)
+    if not paths:
+        print("[ERROR] No test*.xml files matched.", file=sys.stderr)
+        return 2
+    if args.schedule and not args.dry_run:
+        return _run_scheduled(args, paths)
+    if not args.resource and not args.dry_run:
+        print("[ERROR] Give at least one --resource (or --dry-run).", file=sys.stderr)
+        return 2
+
+    def progress(i, total, result):
+        state = "ok" if result["ok"] else "FAILED"
+        count = f"{i}/{total}" if total else str(i)
+        print(f"[{count}] test{result['test']}  {result['elapsed_s']:.3f}s  {state}")
+        for t in result["targets"]:
+            if not t["ok"]:
+                print(f"    {t['resource']}: {t['error']}")
+
+    store = None
+    if args.capture and not args.dry_run:
+        from utils.capture_store import CaptureStore
+        store = CaptureStore(args.capture)
+
+    if args.trace:
+        trace.enable()
+    try:
+        results = run_plan(paths, args.resource, dry_run=args.dry_run, capture_store=store,
+                           sweep_axes=args.sweep_axes, combine=args.combine,
+                           stop_on_error=args.stop_on_error, progress=progress,
+                           timeout_s=args.timeout, batch=args.batch, diff=args.diff,
+                           check_errors=args.check_errors)
+    except ValueError as e:
+        # Malformed test file or a sweep axis the config cannot take
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    if args.trace:
+        trace.export_chrome_trace(args.trace)
+        print(f"Trace written to {args.trace} (open in chrome://tracing or Perfetto)")
+
+    s = results["summary"]
+    print(f"{s['passed']}/{s['tests']} passed in {s['wall_s']:.2f}s "
+          f"({s['configs_per_s']:.1f} configs/s) -> {args.out}")
+    return 0 if s["failed"] == 0 else 1
+
+def _run_scheduled(args, paths) -> int:
+    from core.scheduler import Scheduler, instruments_from_rows, jobs_from_paths
+    from utils.discovery import discover_instruments
+
+    # Probe the given resources, or everything VISA lists, for their model
+    rows = discover_instruments(resources=args.resource or None)
+    instruments = instruments_from_rows(rows, args.model)
+    if not instruments:
+        print("[ERROR] No responding instrument matches.", file=sys.stderr)
+        return 2
+    print(f"Scheduling on {len(instruments)} instrument(s): "
+          + ", ".join(f"{res} ({model})" for res, model in instruments))
+
+    def progress(i, result):
+        state = "ok" if result["ok"] else f"FAILED: {result['error']}"
+        print(f"[{i}] test{result['test']}  {result['resource'] or '-'}  "
+              f"{result['elapsed_s']:.3f}s  {state}")
+
+    if args.trace:
+        trace.enable()
+    scheduler = Scheduler(instruments, checkpoint=args.checkpoint, batch=args.batch,
+                          diff=args.diff, check_errors=args.check_errors)
+    jobs = jobs_from_paths(paths, sweep_axes=args.sweep_axes, combine=args.combine)
+    try:
+        results = scheduler.run(jobs, progress=progress)
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    if args.trace:
+        trace.export_chrome_trace(args.trace)
+        print(f"Trace written to {args.trace} (open in chrome://tracing or Perfetto)")
+
+    s = results["summary"]
+    resumed = f", {s['resumed']} already done" if s["resumed"] else ""
+    print(f"{s['passed']}/{s['tests']} passed{resumed} in {s['wall_s']:.2f}s "
+          f"({s['configs_per_s']:.1f} configs/s, {s['utilization']:.0%} bench utilization) "
+          f"-> {args.out}")
+    return 0 if s["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
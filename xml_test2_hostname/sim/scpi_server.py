@@ -0,0 +1,277 @@
+"""Simulated Keysight scope speaking raw-socket SCPI (the ::SOCKET protocol).
+
+Run from the project root:
+  python -m sim.scpi_server --count 24 --base-port 5025 --latency-ms 2 --jitter-ms 1
+
+Each instance listens on its own localhost port and is reachable as
+TCPIP0::127.0.0.1::<port>::SOCKET. It answers *IDN?, *OPC? and SYST:ERR?,
+tracks the :CHAN/:TIM/:TRIG/:DISP settings build_scpi_sequence emits (and
+answers their queries), serves a synthetic sine per channel through
+:WAV:PRE? and :WAV:DATA? (BYTE/WORD binary blocks), and can inject latency,
+jitter, swallowed replies (client timeouts) and dropped connections.
+"""
+import argparse
+import math
+import random
+import sys
+from array import array
+import socket
+import socketserver
+import threading
+import time
+
+MODEL = "DSOX3034T"
+# Setting subsystems we model; anything else is an undefined header
+SETTING_ROOTS = ("CHAN", "TIM", "TRIG", "DISP", "WAV", "ACQ")
+ACTIONS = ("SINGLE", "RUN", "STOP", "DIG", "DIGITIZE", "AUT", "AUTOSCALE")
+DEFAULT_POINTS = 1000
+MAX_POINTS = 8_000_000
+
+class Faults:
+    def __init__(self, latency_s: float = 0.0, jitter_s: float = 0.0,
+                 timeout_rate: float = 0.0, drop_rate: float = 0.0, seed: int | None = None):
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.timeout_rate = timeout_rate
+        self.drop_rate = drop_rate
+        self.rng = random.Random(seed)
+
+    def delay(self):
+        d = self.latency_s + (self.rng.uniform(-self.jitter_s, self.jitter_s) if self.jitter_s else 0.0)
+        if d > 0:
+            time.sleep(d)
+
+    def drop(self) -> bool:
+        return self.drop_rate > 0 and self.rng.random() < self.drop_rate
+
+    def swallow(self) -> bool:
+        return self.timeout_rate > 0 and self.rng.random() < self.timeout_rate
+
+def _number(value, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def _format_reply(value: str) -> str:
+    v = value.strip()
+    up = v.upper()
+    if up in ("ON", "OFF"):
+        return "1" if up == "ON" else "0"
+    if len(v) >= 2 and v[0] in "'\"" and v[-1] == v[0]:
+        return '"' + v[1:-1] + '"'
+    try:
+        return "%+.6E" % float(v)
+    except ValueError:
+        return up
+
+class ScopeState:
+    """SCPI state machine of one simulated scope (thread-safe)."""
+    def __init__(self, serial: str = "SIM00000"):
+        self.serial = serial
+        self.settings = {}
+        self.errors = []
+        self.commands = 0
+        self._block_key = None   # last generated :WAV:DATA? block
+        self._block = b""
+        self._lock = threading.Lock()
+
+    def reset(self):
+        self.settings.clear()
+        self.errors.clear()
+
+    def _push_error(self, code: int, text: str):
+        if len(self.errors) < 30:
+            self.errors.append(f'{code:+d},"{text}"')
+
+    def _query(self, header: str) -> str:
+        if header == "*IDN":
+            return f"KEYSIGHT TECHNOLOGIES,{MODEL},{self.serial},07.50.2021102830"
+        if header == "*OPC":
+            return "1"
+        if header in ("SYST:ERR", "SYSTEM:ERROR"):
+            return self.errors.pop(0) if self.errors else '+0,"No error"'
+        if header == "*ESR":
+            return "0"
+        if header == "TER":
+            return "1"
+        if header in ("WAV:PRE", "WAV:PREAMBLE"):
+            return self._preamble()
+        if header == "WAV:DATA":
+            return self._waveform_block()
+        if header in self.settings:
+            return _format_reply(self.settings[header])
+        self._push_error(-113, "Undefined header")
+        return None
+
+    def _waveform_params(self):
+        s = self.settings
+        fmt = s.get("WAV:FORM", "BYTE").upper()[:4]
+        width = 2 if fmt == "WORD" else 1
+        points = int(min(max(_number(s.get("WAV:POIN"), DEFAULT_POINTS), 1), MAX_POINTS))
+        source = s.get("WAV:SOUR", "CHAN1").upper()
+        channel = int(source[4:]) if source[4:].isdigit() else 1
+        volts_per_div = _number(s.get(f"CHAN{channel}:SCAL"), 1.0)
+        # Full code range spans 8 divisions; codes are signed around 0
+        y_inc = 8 * volts_per_div / (256 ** width)
+        x_inc = 10 * _number(s.get("TIM:SCAL"), 1e-3) / points
+        return fmt, width, points, channel, y_inc, x_inc
+
+    def _preamble(self) -> str:
+        fmt, width, points, _, y_inc, x_inc = self._waveform_params()
+        code = 1 if fmt == "WORD" else 0
+        return (f"+{code},+0,+{points},+1,{x_inc:+.6E},{-points / 2 * x_inc:+.6E},+0,"
+                f"{y_inc:+.6E},+0.000000E+00,+0")
+
+    def _waveform_block(self) -> bytes:
+        fmt, width, points, channel, _, _ = self._waveform_params()
+        # Three divisions of amplitude, `channel` periods across the record
+        big = self.settings.get("WAV:BYT", "MSBF").upper().startswith("M")
+        key = (width, points, channel, big)
+        if self._block_key != key:
+            amp = 3 / 8 * (256 ** width) / 2
+            step = 2 * math.pi * channel / points
+            samples = array("h" if width == 2 else "b",
+                            (int(amp * math.sin(i * step)) for i in range(points)))
+            if width == 2 and big != (sys.byteorder == "big"):
+                samples.byteswap()
+            data = samples.tobytes()
+            size = str(len(data))
+            self._block = f"#{len(size)}{size}".encode("ascii") + data
+            self._block_key = key
+        return self._block
+
+    def handle(self, message: str) -> list:
+        """Execute one message; return the replies to send (in order)."""
+        replies = []
+        prefix = ""
+        with self._lock:
+            for part in message.split(";"):
+                part = part.strip()
+                if not part:
+                    continue
+                self.commands += 1
+                head, _, arg = part.partition(" ")
+                head = head.upper()
+                if head.startswith("*"):
+                    full = head
+                elif head.startswith(":"):
+                    full = head[1:]
+                else:
+                    # SCPI: a relative header continues the previous path
+                    full = prefix + head
+                if not full.startswith("*"):
+                    prefix = full.rsplit(":", 1)[0] + ":" if ":" in full else ""
+                if full.endswith("?"):
+                    reply = self._query(full[:-1])
+                    if reply is not None:
+                        replies.append(reply)
+                elif full == "*CLS":
+                    self.errors.clear()
+                elif full == "*RST":
+                    self.reset()
+                elif full in ("*OPC", "*WAI"):
+                    pass
+                elif not arg and full in ACTIONS:
+                    pass
+                elif arg and full.split(":", 1)[0].rstrip("0123456789") in SETTING_ROOTS:
+                    self.settings[full] = arg.strip()
+                else:
+                    self._push_error(-113, "Undefined header")
+        return replies
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        for raw in self.rfile:
+            if server.faults.drop():
+                # Simulate a link drop: close without replying
+                self.connection.shutdown(socket.SHUT_RDWR)
+                return
+            message = raw.decode("ascii", "replace").rstrip("\r\n")
+            replies = server.state.handle(message)
+            if not replies:
+                continue
+            server.faults.delay()
+            if server.faults.swallow():
+                continue
+            # Binary blocks (:WAV:DATA?) are passed through as bytes
+            payload = b"\n".join(r if isinstance(r, bytes) else r.encode("ascii") for r in replies)
+            self.wfile.write(payload + b"\n")
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class SimulatedScope:
+    def __init__(self, port: int = 0, host: str = "127.0.0.1", faults: Faults | None = None,
+                 serial: str | None = None):
+        self._server = _TCPServer((host, port), _Handler)
+        self._server.faults = faults or Faults()
+        self.port = self._server.server_address[1]
+        self._server.state = ScopeState(serial or f"SIM{self.port:05d}")
+        self._thread = None
+
+    @property
+    def state(self) -> ScopeState:
+        return self._server.state
+
+    @property
+    def resource(self) -> str:
+        return f"TCPIP0::{self._server.server_address[0]}::{self.port}::SOCKET"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name=f"sim-scope-{self.port}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def start_fleet(count: int, base_port: int = 0, host: str = "127.0.0.1", **fault_kwargs) -> list:
+    """Start `count` scopes on consecutive ports (ephemeral ports if base_port is 0)."""
+    scopes = []
+    try:
+        for i in range(count):
+            port = base_port + i if base_port else 0
+            scopes.append(SimulatedScope(port, host, Faults(**fault_kwargs)).start())
+    except Exception:
+        stop_fleet(scopes)
+        raise
+    return scopes
+
+def stop_fleet(scopes):
+    for s in scopes:
+        s.stop()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Simulated raw-socket SCPI scopes.",
+                                 formatter_class=argparse.RawDescriptionHelpFormatter,
+                                 epilog=__doc__)
+    ap.add_argument("--count", type=int, default=1)
+    ap.add_argument("--base-port", type=int, default=5025)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="delay before each reply")
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of replies swallowed")
+    ap.add_argument("--drop-rate", type=float, default=0.0, help="fraction of messages that drop the link")
+    args = ap.parse_args(argv)
+
+    scopes = start_fleet(args.count, args.base_port, args.host,
+                         latency_s=args.latency_ms / 1000.0, jitter_s=args.jitter_ms / 1000.0,
+                         timeout_rate=args.timeout_rate, drop_rate=args.drop_rate)
+    for s in scopes:
+        print(s.resource)
+    print(f"{len(scopes)} simulated scope(s) running; Ctrl-C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_fleet(scopes)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import pytest
+
+from core.diff import get_state_cache
+from core.sessions import SessionManager, set_session_manager
+from sim.scpi_server import start_fleet, stop_fleet
+
+@pytest.fixture
+def manager():
+    """A fresh process-default SessionManager and an empty diff state."""
+    manager = SessionManager()
+    previous = set_session_manager(manager)
+    get_state_cache().forget()
+    yield manager
+    manager.close_all()
+    set_session_manager(previous)
+    get_state_cache().forget()
+
+@pytest.fixture
+def fleet(manager):
+    scopes = start_fleet(2)
+    yield scopes
+    stop_fleet(scopes)
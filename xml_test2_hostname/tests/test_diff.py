@@ -0,0 +1,45 @@
+from config.keysight_scope import build_scpi_sequence
+from config.model import ScopeConfig
+from core.xml_ro_scpi import apply_commands
+
+BASE = ScopeConfig(channels=[{"number": 1, "display": True, "scale": "0.5"},
+                             {"number": 2, "display": False}],
+                   display_label=True, time_scale="1e-3",
+                   trigger={"mode": "EDGE", "source": "CHAN1", "level": "0.2", "slope": "POS"})
+CMDS = build_scpi_sequence(BASE)
+
+def _sent(scope, cmds, **kwargs):
+    # Batched, so the closing *OPC? waits for the scope to take every command
+    before = scope.state.commands
+    apply_commands(cmds, scope.resource, diff=True, batch=True, **kwargs)
+    return scope.state.commands - before - 1
+
+def test_first_apply_is_full(fleet):
+    assert _sent(fleet[0], CMDS) == len(CMDS)
+
+def test_repeat_apply_sends_only_actions(fleet):
+    _sent(fleet[0], CMDS)
+    assert _sent(fleet[0], CMDS) == 1   # SINGLE
+
+def test_changed_setting_is_all_that_is_sent(fleet):
+    scope = fleet[0]
+    _sent(scope, CMDS)
+    changed = build_scpi_sequence(BASE.replace(time_scale="2e-3"))
+    assert _sent(scope, changed) == 2   # :TIM:SCAL and SINGLE
+    assert scope.state.settings["TIM:SCAL"] == "2e-3"
+
+def test_reconnect_forces_full_apply(fleet, manager):
+    _sent(fleet[0], CMDS)
+    manager.close_all()
+    assert _sent(fleet[0], CMDS) == len(CMDS)
+
+def test_verify_state_resends_settings_changed_on_the_scope(fleet):
+    scope = fleet[0]
+    _sent(scope, CMDS)
+    scope.state.settings["TIM:SCAL"] = "5"   # e.g. turned on the front panel
+    apply_commands(CMDS, scope.resource, diff=True, verify_state=True, batch=True)
+    assert scope.state.settings["TIM:SCAL"] == "1e-3"
+
+def test_state_is_kept_per_resource(fleet):
+    _sent(fleet[0], CMDS)
+    assert _sent(fleet[1], CMDS) == len(CMDS)
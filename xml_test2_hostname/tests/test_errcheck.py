@@ -0,0 +1,43 @@
+from benchmarks.sim_instrument import SimulatedInstrument
+from core.batching import send_individually
+from core.errcheck import bisect_errors, read_errors, send_checked
+
+CMDS = [":TIM:SCAL 1e-3", ":CHAN1:SCAL 0.5", ":BOGUS 1", ":TRIG:MODE EDGE", ":NOPE:X 2",
+        ":TRIG:EDGE:LEV 0.5", "SINGLE"]
+
+def _instrument():
+    return SimulatedInstrument(latency_s=0.0)
+
+def test_clean_sequence_is_sent_once():
+    inst = _instrument()
+    clean = [c for c in CMDS if c not in (":BOGUS 1", ":NOPE:X 2")]
+    assert send_checked(inst, clean, send_individually) == []
+    assert inst.messages == ["*CLS"] + clean + ["SYST:ERR?"]
+
+def test_rejected_commands_are_named():
+    inst = _instrument()
+    failures = send_checked(inst, CMDS, send_individually)
+    assert [cmd for cmd, _ in failures] == [":BOGUS 1", ":NOPE:X 2"]
+    assert all(len(errors) == 1 and errors[0].startswith("-113") for _, errors in failures)
+    # The scope ends up fully configured and armed once more
+    assert inst.state.settings["TRIG:EDGE:LEV"] == "0.5"
+
+def test_actions_are_not_replayed_while_bisecting():
+    inst = _instrument()
+    send_checked(inst, CMDS, send_individually)
+    # Once in the first send, once when the scope is restored
+    assert inst.messages.count("SINGLE") == 2
+
+def test_replays_are_bounded():
+    inst = _instrument()
+    cmds = [f":BAD{i}:X 1" for i in range(20)] + [":TIM:SCAL 1e-3", "SINGLE"]
+    send_individually(inst, ["*CLS"] + cmds)
+    errors = read_errors(inst)
+    inst.messages.clear()
+    failures = bisect_errors(inst, cmds, send_individually, errors, max_replays=5)
+    # Five replays plus the closing restore
+    assert inst.messages.count("*CLS") <= 6
+    attributed = [cmd for cmd, _ in failures if cmd is not None]
+    assert attributed == cmds[:len(attributed)]
+    assert failures[-1][0] is None
+    assert sum(len(e) for _, e in failures) == len(errors)
@@ -0,0 +1,44 @@
+import time
+
+from config.keysight_scope import build_scpi_sequence
+from config.model import ScopeConfig
+from core.diff import get_state_cache
+from core.fanout import apply_commands_to_many, busy_resources
+from sim.scpi_server import Faults, SimulatedScope
+
+CMDS = build_scpi_sequence(ScopeConfig(channels=[{"number": 1, "display": True, "scale": "0.5"}],
+                                       time_scale="1e-3"))
+
+def _wait_idle(resource, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while resource in busy_resources():
+        assert time.monotonic() < deadline, f"{resource} never became idle"
+        time.sleep(0.02)
+
+def test_fan_out_reports_every_target(fleet):
+    report = apply_commands_to_many(CMDS, [s.resource for s in fleet], batch=True)
+    assert [r["resource"] for r in report] == [s.resource for s in fleet]
+    assert all(r["ok"] for r in report)
+    assert all(s.state.settings["TIM:SCAL"] == "1e-3" for s in fleet)
+
+def test_timed_out_target_stays_busy_until_its_worker_returns(fleet, manager):
+    # Replies take 0.5 s, so the batched apply's *OPC? misses a 0.2 s deadline
+    slow = SimulatedScope(faults=Faults(latency_s=0.5)).start()
+    try:
+        res = slow.resource
+        report = apply_commands_to_many(CMDS, [res, fleet[0].resource], timeout_s=0.2,
+                                        batch=True, diff=True)
+        assert not report[0]["ok"] and "timed out" in report[0]["error"]
+        assert report[1]["ok"]
+        assert res in busy_resources()
+
+        again = apply_commands_to_many(CMDS, [res], timeout_s=0.2, batch=True)
+        assert not again[0]["ok"] and "busy" in again[0]["error"]
+
+        _wait_idle(res)
+        # The late worker committed its diff state; it must not be trusted
+        assert get_state_cache().plan(res, CMDS, manager.generation(res)) == CMDS
+        assert apply_commands_to_many(CMDS, [res], timeout_s=5.0, batch=True)[0]["ok"]
+    finally:
+        _wait_idle(slow.resource)
+        slow.stop()
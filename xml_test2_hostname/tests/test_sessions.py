@@ -0,0 +1,65 @@
+import time
+
+import pytest
+from pyvisa.constants import StatusCode
+from pyvisa.errors import VisaIOError
+
+from core.sessions import SessionManager
+from sim.scpi_server import Faults, SimulatedScope
+
+def _fails_once(error):
+    calls = []
+
+    def fn(inst):
+        calls.append(inst)
+        if len(calls) == 1:
+            raise error
+        return inst.query("*IDN?")
+    return fn, calls
+
+@pytest.mark.parametrize("error", [ConnectionResetError("link dropped"),
+                                   VisaIOError(StatusCode.error_connection_lost)])
+def test_reused_session_reconnects_after_a_lost_link(fleet, manager, error):
+    res = fleet[0].resource
+    manager.run(res, lambda inst: inst.query("*IDN?"))
+    opened = manager.generation(res)
+    fn, calls = _fails_once(error)
+    assert "DSOX3034T" in manager.run(res, fn)
+    assert len(calls) == 2
+    assert manager.generation(res) == opened + 1
+
+@pytest.mark.parametrize("error", [VisaIOError(StatusCode.error_timeout), TimeoutError(),
+                                   ValueError("bad reply")])
+def test_reused_session_is_not_retried_for_other_errors(fleet, manager, error):
+    res = fleet[0].resource
+    manager.run(res, lambda inst: inst.query("*IDN?"))
+    opened = manager.generation(res)
+    fn, calls = _fails_once(error)
+    with pytest.raises(type(error)):
+        manager.run(res, fn)
+    assert len(calls) == 1
+    assert manager.generation(res) == opened
+
+def test_swallowed_reply_is_sent_once(manager):
+    faults = Faults()
+    scope = SimulatedScope(faults=faults).start()
+    try:
+        manager.run(scope.resource, lambda inst: inst.query("*IDN?"))
+        faults.timeout_rate = 1.0
+        before = scope.state.commands
+        with pytest.raises(VisaIOError):
+            manager.run(scope.resource, lambda inst: inst.query("*IDN?"), timeout_ms=200)
+        assert scope.state.commands - before == 1
+    finally:
+        scope.stop()
+
+def test_idle_sessions_are_closed_without_further_calls(fleet):
+    manager = SessionManager(idle_timeout_s=0.2)
+    try:
+        for scope in fleet:
+            manager.run(scope.resource, lambda inst: inst.query("*IDN?"))
+        assert manager._idle
+        time.sleep(0.6)
+        assert not manager._idle
+    finally:
+        manager.close_all()
@@ -0,0 +1,55 @@
+import random
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from utils.xml_writer import prettify_xml, prettify_xml_minidom
+
+# Characters minidom escapes, folds or keeps, in text, tails and attributes
+_ALPHABET = ["a", "b", " ", "  ", "\n", "\r", "\r\n", "\t", "&", "<", ">", '"', "'", "é", "x"]
+
+def _random_text(rng):
+    return "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 5)))
+
+def _random_tree(rng, depth=0):
+    elem = ET.Element(rng.choice(["a", "b", "c"]))
+    for _ in range(rng.randint(0, 2)):
+        elem.set(rng.choice(["x", "y", "z"]), _random_text(rng))
+    if rng.random() < 0.5:
+        elem.text = _random_text(rng)
+    if depth < 3:
+        for _ in range(rng.randint(0, 3)):
+            child = _random_tree(rng, depth + 1)
+            if rng.random() < 0.4:
+                child.tail = _random_text(rng)
+            elem.append(child)
+    return elem
+
+def _config_tree():
+    config = ET.Element("configuration")
+    for n in range(1, 5):
+        ch = ET.SubElement(config, "channel", number=str(n))
+        ET.SubElement(ch, "display").text = "ON"
+        ET.SubElement(ch, "label").text = f"Probe & <{n}>"
+        ET.SubElement(ch, "scale").text = "0.5"
+    ET.SubElement(config, "time_scale").text = "0.05"
+    trig = ET.SubElement(config, "trigger")
+    ET.SubElement(trig, "mode").text = "EDGE"
+    ET.SubElement(config, "trigger_command").text = ""
+    return config
+
+def test_config_matches_minidom():
+    elem = _config_tree()
+    assert prettify_xml(elem) == prettify_xml_minidom(elem)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_trees_match_minidom(seed):
+    rng = random.Random(seed)
+    for _ in range(1000):
+        elem = _random_tree(rng)
+        assert prettify_xml(elem) == prettify_xml_minidom(elem), ET.tostring(elem)
+
+def test_unsupported_trees_fall_back_to_minidom():
+    elem = ET.Element("{urn:x}root")
+    elem.append(ET.Comment(" note "))
+    assert prettify_xml(elem) == prettify_xml_minidom(elem)
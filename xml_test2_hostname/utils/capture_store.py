@@ -0,0 +1,147 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from utils.test_index import test_sort_key
+
+try:
+    import fcntl
+except ImportError:  # Windows: O_APPEND alone keeps single writes whole
+    fcntl = None
+
+# On-disk store for waveform captures. Each channel's samples go to their
+# own .npy file under data/<test>/, which readers open with mmap so slicing
+# a multi-megapoint record touches only the pages it needs. A capture is
+# published by appending one JSON line to index.jsonl after its data files
+# are in place, so concurrent runners (threads or processes) only ever
+# append, earlier data is never rewritten, and a reader never sees a
+# capture whose samples are still being written.
+INDEX_NAME = "index.jsonl"
+DATA_DIR = "data"
+_SAFE_RE = re.compile(r"[^\w.-]")
+
+class Capture:
+    """One index entry: a test's channels captured from a resource at a time."""
+    __slots__ = ("id", "test", "resource", "timestamp", "channels", "_root")
+
+    def __init__(self, record: dict, root: str):
+        self.id = record["id"]
+        self.test = record["test"]
+        self.resource = record["resource"]
+        self.timestamp = record["timestamp"]
+        self.channels = {int(c["channel"]): c for c in record["channels"]}
+        self._root = root
+
+    def __repr__(self):
+        return (f"Capture(test={self.test!r}, resource={self.resource!r}, "
+                f"timestamp={self.timestamp:.3f}, channels={sorted(self.channels)})")
+
+    def samples(self, channel: int):
+        """Memory-mapped, read-only samples of channel; slice it to read part."""
+        meta = self.channels[channel]
+        return np.load(os.path.join(self._root, meta["file"]), mmap_mode="r")
+
+    def times(self, channel: int, start: int = 0, stop: int | None = None):
+        meta = self.channels[channel]
+        stop = meta["points"] if stop is None else min(stop, meta["points"])
+        idx = np.arange(start, stop)
+        return meta["x_origin"] + (idx - meta["x_reference"]) * meta["x_increment"]
+
+class CaptureStore:
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._captures = []      # in index order
+        self._by_test = {}       # test -> [Capture, ...]
+        self._offset = 0         # bytes of index.jsonl already read
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.root, DATA_DIR), exist_ok=True)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.root, INDEX_NAME)
+
+    def _write_channel(self, rel: str, volts):
+        path = os.path.join(self.root, rel)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(volts))
+        os.replace(tmp, path)
+
+    def _append_index(self, record: dict):
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            os.write(fd, line)
+        finally:
+            os.close(fd)   # releases the lock
+
+    def add(self, test: str, resource: str, waveforms, timestamp: float | None = None) -> Capture:
+        """Store waveforms (core.acquire.Waveform-like) for test on resource."""
+        timestamp = time.time() if timestamp is None else timestamp
+        capture_id = f"{int(timestamp * 1000)}-{uuid.uuid4().hex[:8]}"
+        folder = os.path.join(DATA_DIR, _SAFE_RE.sub("_", str(test)) or "_")
+        os.makedirs(os.path.join(self.root, folder), exist_ok=True)
+        channels = []
+        for w in waveforms:
+            rel = os.path.join(folder, f"{capture_id}.ch{w.channel}.npy")
+            self._write_channel(rel, w.volts)
+            channels.append({
+                "channel": int(w.channel), "file": rel, "points": int(len(w.volts)),
+                "dtype": str(w.volts.dtype), "x_increment": w.x_increment,
+                "x_origin": w.x_origin, "x_reference": w.x_reference,
+            })
+        record = {"id": capture_id, "test": str(test), "resource": resource,
+                  "timestamp": timestamp, "channels": channels}
+        self._append_index(record)
+        return Capture(record, self.root)
+
+    def refresh(self):
+        """Read index lines appended (by any writer) since the last refresh."""
+        with self._lock:
+            try:
+                with open(self.index_path, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read()
+            except FileNotFoundError:
+                return
+            # A line still being appended has no newline yet; pick it up next time
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    cap = Capture(json.loads(line), self.root)
+                except (ValueError, KeyError):
+                    continue
+                self._captures.append(cap)
+                self._by_test.setdefault(cap.test, []).append(cap)
+            self._offset += end
+
+    def captures(self, test: str | None = None, resource: str | None = None,
+                 since: float | None = None, until: float | None = None) -> list:
+        """Captures matching every given filter, oldest first."""
+        self.refresh()
+        with self._lock:
+            pool = self._captures if test is None else self._by_test.get(str(test), [])
+            found = [c for c in pool
+                     if (resource is None or c.resource == resource)
+                     and (since is None or c.timestamp >= since)
+                     and (until is None or c.timestamp < until)]
+        found.sort(key=lambda c: c.timestamp)
+        return found
+
+    def latest(self, test: str, resource: str | None = None) -> Capture | None:
+        found = self.captures(test, resource)
+        return found[-1] if found else None
+
+    def tests(self) -> list:
+        self.refresh()
+        with self._lock:
+            return sorted(self._by_test, key=test_sort_key)
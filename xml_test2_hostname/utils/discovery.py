@@ -1,6 +1,18 @@
 
-import socket
-import pyvisa
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from core.sessions import SessionManager, get_session_manager
+from utils.discovery_cache import DiscoveryCache, get_default_cache
+from utils.resolver import HostResolver, get_default_resolver
+from utils.trace import span
+
+# Worker pool and deadlines for a scan. A host that is powered off only
+# costs HOST_TIMEOUT_MS of one worker; the whole scan never runs past
+# SCAN_TIMEOUT_S no matter how many hosts hang.
+MAX_WORKERS = 16
+HOST_TIMEOUT_MS = 1500
+SCAN_TIMEOUT_S = 10.0
 
 def _extract_host(resource: str) -> str:
     try:
@@ -9,64 +21,145 @@ def _extract_host(resource: str) -> str:
     except Exception:
         return ""
 
-def _reverse_dns(ip_or_host: str) -> str:
-    if not ip_or_host:
-        return ""
+def _is_candidate(res: str) -> bool:
+    up = res.upper()
+    # Hard filter: no HiSLIP
+    if "HISLIP" in up:
+        return False
+    # Keep classic INSTR and SOCKET only
+    return up.endswith("::INSTR") or up.endswith("::SOCKET")
+
+def _query_idn(manager: SessionManager, res: str, timeout_ms: int) -> str:
+    opened = False
     try:
-        name, _, _ = socket.gethostbyaddr(ip_or_host)
-        return name
-    except Exception:
-        # Try forward lookup to get a canonical name if already a hostname
-        try:
-            return socket.gethostbyname_ex(ip_or_host)[0]
-        except Exception:
-            return ip_or_host  # fall back to the raw address
+        # Sessions stay in the pool, so a later apply to this scope reuses them
+        with manager.session(res, timeout_ms) as inst:
+            opened = True
+            try:
+                return inst.query("*IDN?").strip()
+            except Exception:
+                inst.write("*IDN?"); return inst.read().strip()
+    except Exception as e:
+        return "(no response)" if opened else f"(open failed: {e})"
+
+def _probe(manager: SessionManager, resolver: HostResolver, res: str, timeout_ms: int) -> dict:
+    host = _extract_host(res)
+    with span("probe", "discovery", resource=res):
+        with span("*IDN?", "scpi"):
+            idn = _query_idn(manager, res, timeout_ms)
+        # Usually already answered by the prefetch in iter_instruments()
+        with span("resolve", "discovery", host=host):
+            hostname = resolver.resolve(host)
+    return {
+        "hostname": hostname or host or "(unknown)",
+        "resource": res,
+        "idn": idn,
+    }
+
+def _sort_rows(rows: list) -> list:
+    rows.sort(key=lambda r: (r.get("hostname",""), r.get("resource","")))
+    return rows
+
+def iter_instruments(max_workers: int = MAX_WORKERS,
+                     host_timeout_ms: int = HOST_TIMEOUT_MS,
+                     scan_timeout_s: float | None = SCAN_TIMEOUT_S,
+                     cancel=None,
+                     use_cache: bool = True,
+                     refresh: bool = False,
+                     cache: DiscoveryCache | None = None,
+                     resolver: HostResolver | None = None,
+                     resources=None):
+    """Probe VISA resources concurrently, yielding (row, probed, total).
+
+    Fresh rows from the discovery cache are yielded first, without a
+    probe; only resources that are new or past the cache TTL are probed.
+    `total` counts both and is fixed for the whole scan. `refresh=True` ignores cached rows and re-probes
+    everything (the results still update the cache).
 
-def discover_instruments():
+    Probed rows arrive in completion order, so fast hosts show up first.
+    When scan_timeout_s elapses (or `cancel`, a threading.Event, is set)
+    the generator stops and the hosts still pending are left out.
+
+    `resources` replaces the VISA resource list, e.g. for ::SOCKET
+    instruments (or simulators) that VISA cannot enumerate; cached rows
+    for other resources are then left out.
+    """
+    if use_cache and cache is None:
+        cache = get_default_cache()
+    elif not use_cache:
+        cache = None
+
+    probed = 0
+    wanted = None if resources is None else set(resources)
+    fresh = []
+    if cache is not None and not refresh:
+        fresh = [r for r in cache.fresh_rows() if _is_candidate(r["resource"])
+                 and (wanted is None or r["resource"] in wanted)]
+    seen = {row["resource"] for row in fresh}
+
+    manager = get_session_manager()
+    if resources is None:
+        resources = manager.list_resources()
+    resources = [r for r in resources if _is_candidate(r) and r not in seen]
+    # Known before the first row so a progress bar never moves backwards
+    total = len(fresh) + len(resources)
+    for row in fresh:
+        probed += 1
+        yield row, probed, total
+    if cancel is not None and cancel.is_set():
+        return
+    if not resources:
+        return
+    # Start every distinct hostname lookup now, alongside the *IDN? probes
+    resolver = resolver or get_default_resolver()
+    resolver.resolve_many([_extract_host(r) for r in resources], timeout_s=0)
+    deadline = None if scan_timeout_s is None else time.monotonic() + scan_timeout_s
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(resources))),
+                              thread_name_prefix="discovery")
+    try:
+        pending = {pool.submit(_probe, manager, resolver, res, host_timeout_ms) for res in resources}
+        while pending:
+            if cancel is not None and cancel.is_set():
+                break
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            # Wake up periodically so a cancel request is noticed promptly
+            step = 0.2 if remaining is None else min(0.2, remaining)
+            done, pending = wait(pending, timeout=step, return_when=FIRST_COMPLETED)
+            for fut in done:
+                row = fut.result()
+                if cache is not None:
+                    cache.put(row)
+                probed += 1
+                yield row, probed, total
+    finally:
+        # Do not block on hung hosts; their threads finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+        if cache is not None:
+            cache.save()
+
+def discover_instruments(max_workers: int = MAX_WORKERS,
+                         host_timeout_ms: int = HOST_TIMEOUT_MS,
+                         scan_timeout_s: float | None = SCAN_TIMEOUT_S,
+                         use_cache: bool = True,
+                         refresh: bool = False,
+                         resources=None):
     """Return a list of VISA resources excluding HiSLIP, with hostnames.
 
     Each item is a dict:
       - hostname: friendly label (via reverse DNS when possible)
       - resource: full VISA resource string
       - idn: *IDN? response or an error string
-    """
-    rows = []
-    rm = pyvisa.ResourceManager()
-    for res in rm.list_resources():
-        up = res.upper()
-        # Hard filter: no HiSLIP
-        if "HISLIP" in up:
-            continue
-        # Keep classic INSTR and SOCKET only
-        if not (up.endswith("::INSTR") or up.endswith("::SOCKET")):
-            continue
-
-        host = _extract_host(res)
-        hostname = _reverse_dns(host)
-
-        idn = ""
-        try:
-            with rm.open_resource(res, timeout=1500) as inst:
-                try:
-                    inst.read_termination = '\n'
-                    inst.write_termination = '\n'
-                except Exception:
-                    pass
-                try:
-                    idn = inst.query("*IDN?").strip()
-                except Exception:
-                    try:
-                        inst.write("*IDN?"); idn = inst.read().strip()
-                    except Exception:
-                        idn = "(no response)"
-        except Exception as e:
-            idn = f"(open failed: {e})"
-
-        rows.append({
-            "hostname": hostname or host or "(unknown)",
-            "resource": res,
-            "idn": idn,
-        })
 
-    rows.sort(key=lambda r: (r.get("hostname",""), r.get("resource","")))
-    return rows
+    Resources are probed by a pool of `max_workers` threads, each open and
+    query bounded by `host_timeout_ms`. If the scan runs past
+    `scan_timeout_s` the rows gathered so far are returned. Rows still
+    fresh in the discovery cache are returned without probing unless
+    `refresh` is set. `resources` probes the given resource strings
+    instead of the VISA resource list.
+    """
+    rows = [row for row, _, _ in iter_instruments(max_workers, host_timeout_ms, scan_timeout_s,
+                                                  use_cache=use_cache, refresh=refresh,
+                                                  resources=resources)]
+    return _sort_rows(rows)
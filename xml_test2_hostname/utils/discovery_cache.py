@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+import time
+
+# Cache of discovery rows keyed by VISA resource string. It lives in memory
+# for the process and is mirrored to a JSON file so the next launch can show
+# the bench immediately and only re-probe what is stale or new.
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".xml_test2", "discovery_cache.json")
+DEFAULT_TTL_S = 24 * 3600.0
+_CACHE_VERSION = 1
+
+def _is_good_idn(idn: str) -> bool:
+    # Failures are never cached: a scope that was off should be retried
+    return bool(idn) and not idn.startswith("(")
+
+class DiscoveryCache:
+    def __init__(self, path: str | None = DEFAULT_CACHE_PATH, ttl_s: float = DEFAULT_TTL_S):
+        self.path = path
+        self.ttl_s = ttl_s
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable discovery cache {self.path}: {e}")
+            return
+        if data.get("version") != _CACHE_VERSION:
+            return
+        with self._lock:
+            for res, entry in data.get("entries", {}).items():
+                if _is_good_idn(entry.get("idn", "")):
+                    self._entries[res] = entry
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": _CACHE_VERSION, "entries": dict(self._entries)}
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[WARN] Could not write discovery cache {self.path}: {e}")
+
+    def is_fresh(self, entry: dict, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        return now - entry.get("last_seen", 0.0) < self.ttl_s
+
+    def get(self, resource: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(resource)
+        return dict(entry) if entry is not None else None
+
+    def fresh_rows(self, now: float | None = None) -> list:
+        now = time.time() if now is None else now
+        with self._lock:
+            items = list(self._entries.items())
+        return [
+            {"hostname": e["hostname"], "resource": res, "idn": e["idn"]}
+            for res, e in items if self.is_fresh(e, now)
+        ]
+
+    def put(self, row: dict, now: float | None = None):
+        idn = row.get("idn", "")
+        if not _is_good_idn(idn):
+            return
+        entry = {
+            "hostname": row.get("hostname", ""),
+            "idn": idn,
+            "last_seen": time.time() if now is None else now,
+        }
+        with self._lock:
+            self._entries[row["resource"]] = entry
+            self._dirty = True
+
+    def invalidate(self, resource: str | None = None):
+        with self._lock:
+            if resource is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(resource, None)
+            self._dirty = True
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_default_cache() -> DiscoveryCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            ttl = float(os.environ.get("XML_TEST2_DISCOVERY_TTL", DEFAULT_TTL_S))
+            path = os.environ.get("XML_TEST2_DISCOVERY_CACHE", DEFAULT_CACHE_PATH)
+            _default_cache = DiscoveryCache(path or None, ttl)
+        return _default_cache
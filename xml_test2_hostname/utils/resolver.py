@@ -0,0 +1,133 @@
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future, wait
+
+# Hostname resolution for discovery. Results are cached (failures for a
+# shorter time than successes), concurrent lookups of the same host share
+# one in-flight query, and callers never wait longer than the timeout: a
+# slow lookup keeps running in the background and fills the cache later.
+DEFAULT_POSITIVE_TTL_S = 3600.0
+DEFAULT_NEGATIVE_TTL_S = 300.0
+DEFAULT_TIMEOUT_S = 2.0
+DEFAULT_MAX_LOOKUPS = 16
+DEFAULT_HOSTS_PATH = os.path.join(os.path.expanduser("~"), ".xml_test2", "hosts")
+
+def _lookup(ip_or_host: str) -> str | None:
+    try:
+        name, _, _ = socket.gethostbyaddr(ip_or_host)
+        return name
+    except Exception:
+        # Try forward lookup to get a canonical name if already a hostname
+        try:
+            return socket.gethostbyname_ex(ip_or_host)[0]
+        except Exception:
+            return None
+
+def load_hosts_file(path: str) -> dict:
+    """Parse an /etc/hosts style file: `<address> <name> [aliases…]`."""
+    mapping = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            if len(parts) >= 2:
+                mapping[parts[0].lower()] = parts[1]
+    return mapping
+
+class HostResolver:
+    def __init__(self,
+                 positive_ttl_s: float = DEFAULT_POSITIVE_TTL_S,
+                 negative_ttl_s: float = DEFAULT_NEGATIVE_TTL_S,
+                 timeout_s: float = DEFAULT_TIMEOUT_S,
+                 max_lookups: int = DEFAULT_MAX_LOOKUPS,
+                 hosts_file: str | None = None):
+        self.positive_ttl_s = positive_ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self.timeout_s = timeout_s
+        self.static = {}
+        if hosts_file and os.path.isfile(hosts_file):
+            try:
+                self.static = load_hosts_file(hosts_file)
+            except Exception as e:
+                print(f"[WARN] Could not read hosts map {hosts_file}: {e}")
+        self._cache = {}      # host -> (name or None, expires_at)
+        self._inflight = {}   # host -> Future
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, max_lookups))
+
+    def _cached(self, host: str, now: float):
+        entry = self._cache.get(host)
+        if entry is not None and entry[1] > now:
+            return entry
+        return None
+
+    def _run_lookup(self, host: str, fut: Future):
+        with self._slots:
+            name = _lookup(host)
+        ttl = self.positive_ttl_s if name else self.negative_ttl_s
+        with self._lock:
+            self._cache[host] = (name, time.monotonic() + ttl)
+            self._inflight.pop(host, None)
+        fut.set_result(name)
+
+    def _submit(self, host: str) -> Future:
+        # Caller holds self._lock
+        fut = self._inflight.get(host)
+        if fut is None:
+            fut = Future()
+            self._inflight[host] = fut
+            # Daemon threads so a hung resolver never blocks interpreter exit
+            threading.Thread(target=self._run_lookup, args=(host, fut),
+                             name=f"resolve-{host}", daemon=True).start()
+        return fut
+
+    def resolve_many(self, hosts, timeout_s: float | None = None) -> dict:
+        """Resolve each distinct host once; return {host: friendly name}.
+
+        Hosts that do not resolve within the timeout map to themselves.
+        """
+        timeout_s = self.timeout_s if timeout_s is None else timeout_s
+        result = {}
+        futures = {}
+        now = time.monotonic()
+        with self._lock:
+            for host in dict.fromkeys(h for h in hosts if h):
+                static = self.static.get(host.lower())
+                if static:
+                    result[host] = static
+                    continue
+                entry = self._cached(host, now)
+                if entry is not None:
+                    result[host] = entry[0] or host
+                    continue
+                futures[host] = self._submit(host)
+        if futures:
+            wait(futures.values(), timeout=timeout_s)
+            for host, fut in futures.items():
+                name = fut.result() if fut.done() else None
+                result[host] = name or host
+        return result
+
+    def resolve(self, host: str, timeout_s: float | None = None) -> str:
+        if not host:
+            return ""
+        return self.resolve_many([host], timeout_s)[host]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+_default_resolver = None
+_default_lock = threading.Lock()
+
+def get_default_resolver() -> HostResolver:
+    global _default_resolver
+    with _default_lock:
+        if _default_resolver is None:
+            hosts = os.environ.get("XML_TEST2_HOSTS", DEFAULT_HOSTS_PATH)
+            _default_resolver = HostResolver(hosts_file=hosts)
+        return _default_resolver
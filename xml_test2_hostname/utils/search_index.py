@@ -0,0 +1,107 @@
+import bisect
+from collections.abc import Sequence
+
+# Type-ahead search over long lists (discovered instruments, test numbers).
+# Each row's searchable text is lowercased once when the row is added, and
+# the matches for every query typed so far are kept, so the next keystroke
+# only filters the previous matches (typing narrows, backspace is a lookup)
+# instead of rescanning every row. A query matches a row when each of its
+# whitespace-separated words occurs somewhere in the row's text.
+MAX_CACHED_QUERIES = 64
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def _entry_sort_key(entry):
+    return entry[0]
+
+class Matches(Sequence):
+    """Rows matching a query, in index order; only rows asked for are touched."""
+    __slots__ = ("_entries", "_sort_key")
+
+    def __init__(self, entries, sort_key=None):
+        self._entries = entries
+        self._sort_key = sort_key
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [e[2] for e in self._entries[i]]
+        return self._entries[i][2]
+
+    def index(self, row, start=0, stop=None):
+        entries = self._entries
+        stop = len(entries) if stop is None else stop
+        if self._sort_key is not None:
+            # Entries are sorted: jump to the row's sort key
+            key = self._sort_key(row)
+            start = bisect.bisect_left(entries, key, start, stop, key=_entry_sort_key)
+            stop = bisect.bisect_right(entries, key, start, stop, key=_entry_sort_key)
+        for i in range(start, stop):
+            if entries[i][2] == row:
+                return i
+        raise ValueError(f"{row!r} is not in the matches")
+
+class SearchIndex:
+    def __init__(self, rows=(), text=str, sort_key=None):
+        """text(row) gives a row's searchable text; sort_key(row) its order.
+
+        Without sort_key rows keep the order they were added in.
+        """
+        self._text = text
+        self._sort_key = sort_key
+        self._entries = []      # (sort key, lowercased text, row), sorted
+        self._added = 0
+        self._cache = {}        # normalized query -> matching entries
+        self.extend(rows)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _entry(self, row):
+        self._added += 1
+        key = self._sort_key(row) if self._sort_key is not None else self._added
+        return (key, self._text(row).lower(), row)
+
+    def clear(self):
+        self._entries = []
+        self._cache.clear()
+
+    def extend(self, rows):
+        self._entries.extend(self._entry(row) for row in rows)
+        self._entries.sort(key=_entry_sort_key)
+        self._cache.clear()
+
+    def add(self, row):
+        """Insert one row in order, keeping cached matches up to date."""
+        entry = self._entry(row)
+        bisect.insort(self._entries, entry, key=_entry_sort_key)
+        for query, entries in self._cache.items():
+            if all(word in entry[1] for word in query.split()):
+                bisect.insort(entries, entry, key=_entry_sort_key)
+
+    def filter(self, query: str) -> Matches:
+        """Rows matching query; refining the previous query only rescans its matches."""
+        query = normalize_query(query)
+        if not query:
+            return Matches(self._entries, self._sort_key)
+        hit = self._cache.get(query)
+        if hit is not None:
+            return Matches(hit, self._sort_key)
+        # Every row matching query also matches any prefix of it
+        base = self._entries
+        base_len = 0
+        for cached, entries in self._cache.items():
+            if len(cached) > base_len and query.startswith(cached):
+                base, base_len = entries, len(cached)
+        matches = base
+        for word in query.split():
+            matches = [e for e in matches if word in e[1]]
+        # Keep the chain being typed; a different query drops its siblings
+        self._cache = {q: m for q, m in self._cache.items() if query.startswith(q)}
+        if len(self._cache) >= MAX_CACHED_QUERIES:
+            self._cache.pop(min(self._cache, key=len))
+        self._cache[query] = matches
+        return Matches(matches, self._sort_key)
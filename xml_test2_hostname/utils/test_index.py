@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+# Per-directory index of testNNN.xml files. The directory's mtime changes
+# whenever an entry is added, removed or renamed, so one stat() tells us
+# whether the cached listing is still good; only then is the directory
+# rescanned. Our own Save/Clone/Delete update the index in place. The
+# listing is persisted so a large directory opens without a scan.
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".xml_test2", "test_index")
+TEST_FILE_RE = re.compile(r"test(\w+)\.xml", re.IGNORECASE)
+_INDEX_VERSION = 1
+
+def test_sort_key(s: str):
+    try:
+        return (0, int(s), "")
+    except ValueError:
+        return (1, 0, s.lower())
+
+def _dir_mtime(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+class TestIndex:
+    def __init__(self, directory: str, persist_dir: str | None = DEFAULT_INDEX_DIR):
+        self.directory = os.path.abspath(directory)
+        self.persist_dir = persist_dir
+        self._tests = set()
+        self._sorted = []
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _persist_path(self) -> str | None:
+        if not self.persist_dir:
+            return None
+        digest = hashlib.sha1(self.directory.encode("utf-8")).hexdigest()
+        return os.path.join(self.persist_dir, digest + ".json")
+
+    def _load(self):
+        path = self._persist_path()
+        if not path or not os.path.isfile(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == _INDEX_VERSION and data.get("directory") == self.directory:
+            self._tests = set(data.get("tests", []))
+            self._sorted = sorted(self._tests, key=test_sort_key)
+            self._mtime = data.get("mtime_ns")
+
+    def _save(self):
+        path = self._persist_path()
+        if not path:
+            return
+        data = {"version": _INDEX_VERSION, "directory": self.directory,
+                "mtime_ns": self._mtime, "tests": self._sorted}
+        try:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[WARN] Could not persist test index for {self.directory}: {e}")
+
+    def _scan(self) -> set:
+        tests = set()
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    m = TEST_FILE_RE.fullmatch(entry.name)
+                    if m:
+                        tests.add(m.group(1))
+        except OSError:
+            pass
+        return tests
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rescan if the directory changed since the last look; True if the listing changed."""
+        with self._lock:
+            mtime = _dir_mtime(self.directory)
+            if not force and mtime == self._mtime and mtime is not None:
+                return False
+            tests = self._scan() if mtime is not None else set()
+            changed = tests != self._tests
+            self._tests = tests
+            self._sorted = sorted(tests, key=test_sort_key)
+            self._mtime = mtime
+            if mtime is not None:
+                # Nothing worth keeping for a directory that isn't there
+                self._save()
+            return changed
+
+    def tests(self) -> list:
+        self.refresh()
+        return list(self._sorted)
+
+    def _apply(self, add=(), remove=()):
+        # Record our own edit without a rescan. A change someone else made
+        # in the same instant is picked up by the next refresh(force=True).
+        with self._lock:
+            self._tests.update(add)
+            self._tests.difference_update(remove)
+            self._sorted = sorted(self._tests, key=test_sort_key)
+            if self._mtime is not None:
+                self._mtime = _dir_mtime(self.directory)
+                self._save()
+
+    def add(self, test: str):
+        # Names a scan would not list (e.g. "1.5") stay out of the index too
+        if TEST_FILE_RE.fullmatch(f"test{test}.xml"):
+            self._apply(add=[test])
+
+    def remove(self, test: str):
+        self._apply(remove=[test])
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_test_index(directory: str) -> TestIndex:
+    key = os.path.abspath(directory)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if not os.path.isdir(key):
+            # Paths typed into the GUI come and go; only cache real directories
+            _indexes.pop(key, None)
+            return index or TestIndex(key)
+        if index is None:
+            index = _indexes[key] = TestIndex(key)
+        return index
@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Lightweight timed spans for the apply/discovery pipeline, exportable as a
+# Chrome trace (chrome://tracing, Perfetto). Spans are recorded when tracing
+# is enabled globally (enable() or XML_TEST2_TRACE=1) or while the current
+# thread is inside capture(); otherwise span() returns a shared no-op and
+# costs one function call.
+MAX_EVENTS = 1_000_000
+
+_enabled = bool(os.environ.get("XML_TEST2_TRACE"))
+_events = []
+_lock = threading.Lock()
+_local = threading.local()
+_PID = os.getpid()
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "t0")
+
+    def __init__(self, name: str, cat: str, args: dict):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __exit__(self, exc_type, exc, tb):
+        t1 = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = repr(exc)
+        _record({
+            "name": self.name, "cat": self.cat, "ph": "X",
+            "ts": self.t0 * 1e6, "dur": (t1 - self.t0) * 1e6,
+            "pid": _PID, "tid": threading.get_native_id(),
+            "args": self.args,
+        })
+        return False
+
+def _record(event: dict):
+    for recorder in getattr(_local, "recorders", ()):
+        recorder.append(event)
+    if _enabled:
+        with _lock:
+            if len(_events) < MAX_EVENTS:
+                _events.append(event)
+
+def span(name: str, cat: str = "app", **args):
+    """Context manager timing one step; `with span("open", resource=r): ...`"""
+    if not _enabled and not getattr(_local, "recorders", None):
+        return _NULL_SPAN
+    return _Span(name, cat, args)
+
+@contextmanager
+def capture():
+    """Collect the spans recorded by this thread inside the block into a list."""
+    recorders = getattr(_local, "recorders", None)
+    if recorders is None:
+        recorders = _local.recorders = []
+    events = []
+    recorders.append(events)
+    try:
+        yield events
+    finally:
+        recorders.remove(events)
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def clear():
+    with _lock:
+        _events.clear()
+
+def events() -> list:
+    with _lock:
+        return list(_events)
+
+def export_chrome_trace(path: str, evts=None):
+    data = {"traceEvents": events() if evts is None else list(evts), "displayTimeUnit": "ms"}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def summarize(evts) -> dict:
+    """Total time and slowest SCPI command of a captured span list."""
+    evts = list(evts)
+    if not evts:
+        return {"total_s": 0.0, "spans": 0, "slowest": None, "slowest_s": 0.0}
+    roots = [e for e in evts if e["name"] == "apply"]
+    if roots:
+        total = sum(e["dur"] for e in roots) / 1e6
+    else:
+        start = min(e["ts"] for e in evts)
+        total = (max(e["ts"] + e["dur"] for e in evts) - start) / 1e6
+    cmds = [e for e in evts if e["cat"] == "scpi"]
+    slowest = max(cmds, key=lambda e: e["dur"]) if cmds else None
+    return {
+        "total_s": total,
+        "spans": len(evts),
+        "slowest": slowest["name"] if slowest else None,
+        "slowest_s": slowest["dur"] / 1e6 if slowest else 0.0,
+    }
@@ -1,10 +1,20 @@
 import xml.etree.ElementTree as ET
 
+from config.model import ChannelConfig, ScopeConfig, TriggerConfig
+from utils.trace import span
+
+SUITE_TAG = "suite"
+
 def load_config(path):
-    tree = ET.parse(path)
+    with span("parse", path=str(path)):
+        tree = ET.parse(path)
     root = tree.getroot()
     if root.tag != "configuration":
         raise ValueError("Not a valid configuration file (root != configuration)")
+    return parse_configuration(root)
+
+def parse_configuration(root):
+    """Build the config (a read-only, dict-like ScopeConfig) from a <configuration> element."""
 
     channels = []
     channels_elem = root.find("channels")
@@ -16,31 +26,59 @@ def load_config(path):
             probe = (ch.findtext("probe", default="") or "").strip()
             scale = (ch.findtext("scale", default="") or "").strip()
             unit = (ch.findtext("unit", default="") or "").strip().upper()
-            channels.append({
-                "number": num,
-                "display": display,
-                "label": label,
-                "probe": probe,
-                "scale": scale,
-                "unit": unit,
-            })
+            channels.append(ChannelConfig(num, display, label, probe, scale, unit))
 
     display_label = (root.findtext("display_label", default="OFF").strip().upper() == "ON")
     time_scale = (root.findtext("time_scale", default="") or "").strip()
 
     trig_elem = root.find("trigger")
-    trig = {
-        "mode": (trig_elem.findtext("mode", default="EDGE") if trig_elem is not None else "EDGE").strip().upper(),
-        "source": (trig_elem.findtext("source", default="CHAN1") if trig_elem is not None else "CHAN1").strip().upper(),
-        "level": (trig_elem.findtext("level", default="") if trig_elem is not None else "").strip(),
-        "slope": (trig_elem.findtext("slope", default="POS") if trig_elem is not None else "POS").strip().upper(),
-    }
+    trig = TriggerConfig(
+        mode=(trig_elem.findtext("mode", default="EDGE") if trig_elem is not None else "EDGE").strip().upper(),
+        source=(trig_elem.findtext("source", default="CHAN1") if trig_elem is not None else "CHAN1").strip().upper(),
+        level=(trig_elem.findtext("level", default="") if trig_elem is not None else "").strip(),
+        slope=(trig_elem.findtext("slope", default="POS") if trig_elem is not None else "POS").strip().upper(),
+    )
     trig_cmd = (root.findtext("trigger_command", default="SINGLE") or "").strip().upper()
 
-    return {
-        "channels": channels,
-        "display_label": display_label,
-        "time_scale": time_scale,
-        "trigger": trig,
-        "trigger_command": trig_cmd,
-    }
+    return ScopeConfig(channels, display_label, time_scale, trig, trig_cmd)
+
+def is_suite(path) -> bool:
+    """True if path holds a <suite> of configurations (reads only the root tag)."""
+    for _, elem in ET.iterparse(path, events=("start",)):
+        return elem.tag == SUITE_TAG
+    return False
+
+def iter_suite(path):
+    """Stream (name, config) pairs from a suite file.
+
+    A suite is a <suite> root holding any number of <configuration>
+    elements, each optionally named (<configuration name="001">). Each one
+    is parsed and yielded as soon as its closing tag is read, then cleared,
+    so memory stays flat however large the file is. A plain single
+    <configuration> file yields one pair.
+    """
+    depth = 0
+    root = None
+    index = 0
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+                if elem.tag not in (SUITE_TAG, "configuration"):
+                    raise ValueError(f"Not a suite or configuration file (root = {elem.tag})")
+            depth += 1
+            continue
+        depth -= 1
+        if elem.tag != "configuration" or depth > 1:
+            continue
+        if depth == 1 and root.tag != SUITE_TAG:
+            continue
+        index += 1
+        name = elem.attrib.get("name") or str(index)
+        cfg = parse_configuration(elem)
+        # Drop the parsed subtree (and the root's reference to it) first,
+        # so nothing accumulates while the consumer works on this config
+        elem.clear()
+        if elem is not root:
+            root.clear()
+        yield name, cfg
@@ -0,0 +1,77 @@
+import xml.etree.ElementTree as ET
+import xml.dom.minidom as minidom
+
+# Pretty-printer for ElementTree elements that writes, in one pass, exactly
+# what minidom's toprettyxml(indent="    ") produces after an ET.tostring
+# round trip. Trees this writer does not model (comments, processing
+# instructions, namespaced tags) go through the original minidom path.
+INDENT = "    "
+_HEADER = '<?xml version="1.0" ?>\n'
+
+def prettify_xml_minidom(elem: ET.Element) -> str:
+    rough = ET.tostring(elem, "utf-8")
+    parsed = minidom.parseString(rough)
+    return parsed.toprettyxml(indent=INDENT)
+
+def _escape(data: str) -> str:
+    # Same replacements, in the same order, as minidom's _write_data
+    if not data:
+        return data
+    if "&" in data:
+        data = data.replace("&", "&amp;")
+    if "<" in data:
+        data = data.replace("<", "&lt;")
+    if '"' in data:
+        data = data.replace('"', "&quot;")
+    if ">" in data:
+        data = data.replace(">", "&gt;")
+    return data
+
+def _text(data: str) -> str:
+    # An XML parser folds CR and CRLF in character data to LF
+    if "\r" in data:
+        data = data.replace("\r\n", "\n").replace("\r", "\n")
+    return data
+
+def _supported(elem: ET.Element) -> bool:
+    for e in elem.iter():
+        if not isinstance(e.tag, str) or e.tag.startswith("{"):
+            return False
+    return True
+
+def _write(elem: ET.Element, indent: str, out: list):
+    out.append(indent + "<" + elem.tag)
+    for name, value in elem.attrib.items():
+        out.append(' %s="%s"' % (name, _escape(value)))
+    # Child nodes as the DOM sees them: leading text, then each child
+    # followed by its tail text
+    nodes = []
+    if elem.text:
+        nodes.append(_text(elem.text))
+    for child in elem:
+        nodes.append(child)
+        if child.tail:
+            nodes.append(_text(child.tail))
+    if not nodes:
+        out.append("/>\n")
+        return
+    out.append(">")
+    if len(nodes) == 1 and isinstance(nodes[0], str):
+        out.append(_escape(nodes[0]))
+    else:
+        out.append("\n")
+        inner = indent + INDENT
+        for node in nodes:
+            if isinstance(node, str):
+                out.append(_escape(inner + node + "\n"))
+            else:
+                _write(node, inner, out)
+        out.append(indent)
+    out.append("</%s>\n" % elem.tag)
+
+def prettify_xml(elem: ET.Element) -> str:
+    if not _supported(elem):
+        return prettify_xml_minidom(elem)
+    out = [_HEADER]
+    _write(elem, "", out)
+    return "".join(out)